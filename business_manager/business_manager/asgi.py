@@ -9,8 +9,11 @@ https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 
 import os
 
+from django.contrib.staticfiles.handlers import ASGIStaticFilesHandler
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'business_manager.settings')
 
-application = get_asgi_application()
+# run with SERVER_MODE=asgi (see gunicorn.conf.py); requests under STATIC_URL
+# are answered here since WhiteNoise's middleware is left out in that mode
+application = ASGIStaticFilesHandler(get_asgi_application())
@@ -1,42 +1,132 @@
+import io
+from django import forms
 from django.contrib import admin
-from datetime import date
-from .models import Shop, Client, Bill, Payment, Profile
+from django.http import StreamingHttpResponse
+from django.shortcuts import redirect
+from django.template.response import TemplateResponse
+from django.urls import path
+from django.utils import timezone
+from django.utils.text import slugify
+from .models import BILL_STATUS_CHOICES, Shop, Client, Bill, Payment, Profile, OutboundMessage, ReminderLog
+from .imports import IMPORT_COLUMNS, REQUIRED_COLUMNS, import_bills
+from .reconciliation import RECEIPT_COLUMNS, reconcile_payments
+from .statement_export import iter_statements_zip
+from .streaming import streaming_content
 
 
 class ShopAdmin(admin.ModelAdmin):
     list_display = ('name', 'owner', 'created_at')
+    actions = ['download_statements']
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.filter(owner=request.user)
+        return qs.for_user(request.user)
     
     def save_model(self, request, obj, form, change):
         if not change:
             obj.owner = request.user
         super().save_model(request, obj, form, change)
 
+    @admin.action(description="Download all client statements (ZIP)")
+    def download_statements(self, request, queryset):
+        if queryset.count() != 1:
+            self.message_user(request, "Select exactly one shop to export.", level='warning')
+            return None
+
+        shop = queryset.get()
+        filename = f"{slugify(shop.name) or 'shop'}_statements.zip"
+        # rendered in this worker: a process pool per request would multiply
+        # with the server's own workers (export_statements uses one)
+        content = iter_statements_zip(shop, workers=1)
+        response = StreamingHttpResponse(streaming_content(content), content_type='application/zip')
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
 admin.site.register(Shop, ShopAdmin)
-admin.site.register(Profile)
+
+
+@admin.register(Profile)
+class ProfileAdmin(admin.ModelAdmin):
+    list_display = ('user', 'phone')
+    list_select_related = ('user',)
 
 
 @admin.register(Client)
 class ClientAdmin(admin.ModelAdmin):
     list_display = ('name', 'phone', 'address')
+    # shows the search box; the lookup itself is get_search_results()
+    search_fields = ('name', 'phone')
+    search_help_text = "Name words (prefixes) or part of the phone number (start or end)."
+    # skips a count of every client on each search
+    show_full_result_count = False
     
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.filter(shop__owner=request.user)
+        return qs.for_user(request.user)
+
+    def get_search_results(self, request, queryset, search_term):
+        # the indexed search keys instead of an icontains scan of every client
+        if not search_term.strip():
+            return queryset, False
+        shop_ids = Shop.objects.for_user(request.user).values_list('id', flat=True)
+        # as a pk list, so the changelist's "-pk" ordering sorts the matches
+        # instead of walking the whole table in pk order to find them
+        matches = queryset.search(search_term.strip(), shop_ids).values('pk')
+        return queryset.filter(pk__in=matches), False
     
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "shop":
-            kwargs["queryset"] = Shop.objects.filter(owner=request.user)
+            kwargs["queryset"] = Shop.objects.for_user(request.user)
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
 
+class BillImportForm(forms.Form):
+    shop = forms.ModelChoiceField(queryset=Shop.objects.none())
+    csv_file = forms.FileField(label="CSV file")
+    batch_size = forms.IntegerField(min_value=1, initial=1000)
+    dry_run = forms.BooleanField(required=False, help_text="Only check the file; nothing is saved.")
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['shop'].queryset = Shop.objects.for_user(user)
+
+
+class ReceiptUploadForm(forms.Form):
+    shop = forms.ModelChoiceField(queryset=Shop.objects.none())
+    csv_file = forms.FileField(label="Receipts file (CSV)")
+    allow_overpayment = forms.BooleanField(
+        required=False,
+        help_text="Record receipts larger than the pending amount instead of skipping them.",
+    )
+    dry_run = forms.BooleanField(required=False, help_text="Only match the file; nothing is saved.")
+
+    def __init__(self, user, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['shop'].queryset = Shop.objects.for_user(user)
+
+
 class PaymentInline(admin.TabularInline):
     model = Payment
     extra = 1
 
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if db_field.name == "shop":
+            kwargs["queryset"] = Shop.objects.for_user(request.user)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
+
+
+class BillStatusFilter(admin.SimpleListFilter):
+    title = "status"
+    parameter_name = 'status'
+
+    def lookups(self, request, model_admin):
+        return BILL_STATUS_CHOICES
+
+    def queryset(self, request, queryset):
+        if self.value() in dict(BILL_STATUS_CHOICES):
+            return queryset.with_status_code(self.value())
+        return queryset
+
 
 @admin.register(Bill)
 class BillAdmin(admin.ModelAdmin):
@@ -51,37 +141,142 @@ class BillAdmin(admin.ModelAdmin):
         'payment_status',
     )
 
+    list_filter = (BillStatusFilter, 'due_date')
+    list_select_related = ('client', 'sales_person')
+
     inlines = [PaymentInline]
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
-        return qs.filter(shop__owner=request.user)
+        return qs.for_user(request.user).with_status()
 
     def formfield_for_foreignkey(self, db_field, request, **kwargs):
         if db_field.name == "shop":
-            kwargs["queryset"] = Shop.objects.filter(owner=request.user)
+            kwargs["queryset"] = Shop.objects.for_user(request.user)
 
         if db_field.name == "client":
-            kwargs["queryset"] = Client.objects.filter(shop__owner=request.user)
+            kwargs["queryset"] = Client.objects.for_user(request.user)
 
         return super().formfield_for_foreignkey(db_field, request, **kwargs)
 
+    @admin.display(description="Pending Amount", ordering='pending')
     def pending_amount_display(self, obj):
-        return obj.pending_amount()
-
-    pending_amount_display.short_description = "Pending Amount"
+        return obj.pending
 
+    @admin.display(description="Status", ordering='status_code')
     def payment_status(self, obj):
-        if obj.paid_amount >= obj.total_amount:
-            return "Paid"
-        elif obj.due_date < date.today():
-            return "Overdue"
-        elif obj.paid_amount > 0:
-            return "Partial"
-        return "Pending"
-
-    payment_status.short_description = "Status"
+        return obj.status()
 
     def save_related(self, request, form, formsets, change):
         super().save_related(request, form, formsets, change)
-        form.instance.update_paid_amount()
\ No newline at end of file
+        form.instance.update_paid_amount()
+
+    def get_urls(self):
+        return [
+            path('import/', self.admin_site.admin_view(self.import_view), name='sales_bill_import'),
+            path('reconcile/', self.admin_site.admin_view(self.reconcile_view), name='sales_bill_reconcile'),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            return redirect('admin:sales_bill_changelist')
+
+        result = None
+        form = BillImportForm(request.user, request.POST or None, request.FILES or None)
+        if form.is_valid():
+            upload = form.cleaned_data['csv_file']
+            # read the upload as text without loading it all into memory
+            lines = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+            result = import_bills(
+                form.cleaned_data['shop'],
+                lines,
+                batch_size=form.cleaned_data['batch_size'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            level = 'warning' if result.errors else 'success'
+            prefix = "Dry run: would import" if form.cleaned_data['dry_run'] else "Imported"
+            self.message_user(
+                request,
+                f"{prefix} {result.bills_created} bill(s) and {result.clients_created} new client(s) "
+                f"from {result.rows} row(s); {len(result.errors)} row(s) rejected.",
+                level=level,
+            )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Import bills from CSV",
+            'form': form,
+            'result': result,
+            'columns': IMPORT_COLUMNS,
+            'required_columns': REQUIRED_COLUMNS,
+        }
+        return TemplateResponse(request, 'admin/sales/bill/import.html', context)
+
+    def reconcile_view(self, request):
+        if not self.has_change_permission(request):
+            return redirect('admin:sales_bill_changelist')
+
+        result = None
+        form = ReceiptUploadForm(request.user, request.POST or None, request.FILES or None)
+        if form.is_valid():
+            lines = io.TextIOWrapper(form.cleaned_data['csv_file'].file, encoding='utf-8-sig', newline='')
+            result = reconcile_payments(
+                form.cleaned_data['shop'],
+                lines,
+                allow_overpayment=form.cleaned_data['allow_overpayment'],
+                dry_run=form.cleaned_data['dry_run'],
+            )
+            prefix = "Dry run: would record" if form.cleaned_data['dry_run'] else "Recorded"
+            self.message_user(
+                request,
+                f"{prefix} {result.matched} of {result.rows} receipt(s), {result.amount_applied:.2f} in total.",
+                level='warning' if result.report else 'success',
+            )
+
+        context = {
+            **self.admin_site.each_context(request),
+            'opts': self.model._meta,
+            'title': "Reconcile payments",
+            'form': form,
+            'result': result,
+            'columns': RECEIPT_COLUMNS,
+        }
+        return TemplateResponse(request, 'admin/sales/bill/reconcile.html', context)
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    list_display = ('recipient', 'bill', 'status', 'attempts', 'next_attempt_at', 'sent_at', 'last_error')
+    list_filter = ('status',)
+    list_select_related = ('bill__client',)
+    readonly_fields = ('claim_token', 'claimed_at', 'sent_at', 'created_at')
+    actions = ['retry_now']
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.for_user(request.user)
+
+    @admin.action(description="Retry selected messages now")
+    def retry_now(self, request, queryset):
+        updated = queryset.exclude(status='sent').update(
+            status='queued',
+            attempts=0,
+            next_attempt_at=timezone.now(),
+            claim_token='',
+            claimed_at=None,
+        )
+        self.message_user(request, f"{updated} message(s) queued for retry.")
+
+
+@admin.register(ReminderLog)
+class ReminderLogAdmin(admin.ModelAdmin):
+    list_display = ('reminded_at', 'client', 'sales_person', 'stage', 'bill_count', 'pending_amount')
+    list_filter = ('stage',)
+    list_select_related = ('client', 'sales_person')
+    readonly_fields = ('message',)
+    date_hierarchy = 'reminded_at'
+
+    def get_queryset(self, request):
+        qs = super().get_queryset(request)
+        return qs.for_user(request.user)
@@ -0,0 +1,70 @@
+import statistics
+import time
+from contextlib import contextmanager
+
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+@contextmanager
+def scratch_database(keep=False):
+    """Run against a freshly migrated test database instead of the real one.
+
+    Uses the configured backend (SQLite file or DATABASE_URL), so the same
+    benchmark can be pointed at either.
+    """
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keep)
+    try:
+        yield connection.settings_dict['NAME']
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keep)
+
+
+def measure(client, url, repeat=10, warmup=1, method='get', data=None, before=None):
+    """Time `repeat` requests to `url`, after `warmup` untimed ones.
+
+    `data` may be a callable returning the request data, for POSTs that
+    need a fresh idempotency key each time; `before` runs ahead of every
+    request (e.g. to clear caches) outside the timing.
+    """
+    for _ in range(warmup):
+        if before:
+            before()
+        _request(client, method, url, data)
+
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        if before:
+            before()
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            _request(client, method, url, data)
+            timings.append((time.perf_counter() - started) * 1000)
+        queries = len(captured)
+
+    timings.sort()
+    return {
+        'url': url,
+        'median_ms': statistics.median(timings),
+        'p95_ms': timings[min(int(len(timings) * 0.95), len(timings) - 1)],
+        'min_ms': timings[0],
+        'queries': queries,
+    }
+
+
+def _request(client, method, url, data=None):
+    if callable(data):
+        data = data()
+    if method == 'post' and isinstance(data, str):
+        response = client.post(url, data, content_type='application/json')
+    else:
+        response = getattr(client, method)(url, data)
+    if response.status_code >= 400:
+        raise RuntimeError(f"{method.upper()} {url} returned {response.status_code}")
+    # streamed responses only run their queries when consumed
+    if response.streaming:
+        for _ in response.streaming_content:
+            pass
+    return response
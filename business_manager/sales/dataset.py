@@ -0,0 +1,111 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Bill, Client, DailyCollection, Payment, Profile, Shop, ShopCollectionSummary
+from .signals import bump_shop_data_version
+
+
+FIRST_NAMES = ['Asha', 'Ravi', 'Meena', 'Sanjay', 'Pooja', 'Arjun', 'Neha', 'Vikram', 'Kavita', 'Rahul']
+LAST_NAMES = ['Sharma', 'Patel', 'Gupta', 'Verma', 'Reddy', 'Iyer', 'Singh', 'Jain', 'Mehta', 'Rao']
+TRADES = ['Traders', 'Textiles', 'Stores', 'Emporium', 'Fashions', 'Agencies']
+
+
+def generate_dataset(shops=1, clients=50, bills=500, payments=2, sales_people=3, seed=42,
+                     prefix='bench', batch_size=1000):
+    """Create a reproducible synthetic dataset and return the shops it made.
+
+    `clients` and `bills` are per shop; `payments` is the most payments a
+    partly or fully paid bill gets. Due dates run from four months ago to
+    two months ahead, and roughly a third of bills are paid, a third part
+    paid and a third unpaid, so every dashboard bucket and aging bucket has
+    rows. The same arguments always produce the same data.
+    """
+    rng = random.Random(seed)
+    today = timezone.localdate()
+    created_shops = []
+
+    for shop_index in range(shops):
+        with transaction.atomic():
+            # creating the owner creates the shop through the post_save receiver
+            owner = User.objects.create_user(f"{prefix}-{seed}-owner-{shop_index}", password=None)
+            shop = Shop.objects.for_user(owner).get()
+
+            staff = []
+            for person_index in range(sales_people):
+                user = User.objects.create_user(f"{prefix}-{seed}-sales-{shop_index}-{person_index}", password=None)
+                Profile.objects.create(user=user, phone=f"9{rng.randrange(10 ** 8, 10 ** 9)}")
+                staff.append(user)
+
+            client_rows = Client.objects.bulk_create([
+                Client(
+                    shop=shop,
+                    name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {rng.choice(TRADES)}",
+                    phone=f"{rng.choice('6789')}{rng.randrange(10 ** 8, 10 ** 9)}",
+                    address=f"{rng.randrange(1, 500)} Market Road",
+                )
+                for _ in range(clients)
+            ], batch_size=batch_size)
+
+            bill_rows = []
+            for bill_index in range(bills):
+                bill_date = today - timedelta(days=rng.randrange(0, 150))
+                due_date = bill_date + timedelta(days=rng.choice((15, 30, 45, 60)))
+                total = float(rng.randrange(500, 200000, 50))
+                paid_state = rng.random()
+                if paid_state < 0.33:
+                    paid = total
+                elif paid_state < 0.66:
+                    paid = float(round(total * rng.uniform(0.1, 0.9)))
+                else:
+                    paid = 0.0
+                bill_rows.append(Bill(
+                    shop=shop,
+                    client=rng.choice(client_rows),
+                    sales_person=rng.choice(staff) if staff and rng.random() < 0.9 else None,
+                    bill_number=f"{shop_index + 1}-{bill_index + 1:06d}",
+                    bill_date=bill_date,
+                    due_date=due_date,
+                    total_amount=total,
+                    paid_amount=paid,
+                    is_open=paid < total,
+                ))
+            # bulk_create skips Bill.save(), so is_open is set above and the summary rebuilt below
+            bill_rows = Bill.objects.bulk_create(bill_rows, batch_size=batch_size)
+
+            payment_rows = []
+            for bill in bill_rows:
+                if not bill.paid_amount:
+                    continue
+                count = rng.randint(1, max(payments, 1))
+                amounts = _split(bill.paid_amount, count, rng)
+                for amount in amounts:
+                    mode = rng.choice(('cash', 'cheque'))
+                    payment_rows.append(Payment(
+                        shop=shop,
+                        bill=bill,
+                        sales_person_id=bill.sales_person_id,
+                        amount=amount,
+                        payment_mode=mode,
+                        cheque_number=str(rng.randrange(100000, 999999)) if mode == 'cheque' else None,
+                    ))
+            Payment.objects.bulk_create(payment_rows, batch_size=batch_size)
+            DailyCollection.record_payments(payment_rows)
+
+            ShopCollectionSummary.rebuild(shop.id, today)
+            bump_shop_data_version([shop.id])
+            created_shops.append(shop)
+
+    return created_shops
+
+
+def _split(total, parts, rng):
+    cuts = sorted(rng.uniform(0, total) for _ in range(parts - 1))
+    points = [0.0] + cuts + [total]
+    amounts = [round(b - a, 2) for a, b in zip(points, points[1:])]
+    # put rounding drift on the last payment so they add up exactly
+    amounts[-1] = round(total - sum(amounts[:-1]), 2)
+    return amounts
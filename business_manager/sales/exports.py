@@ -0,0 +1,153 @@
+import csv
+import heapq
+from xml.sax.saxutils import escape
+
+from django.conf import settings
+
+from .models import Bill, Payment
+from .streaming import iter_zip
+
+
+LEDGER_HEADER = [
+    'Date', 'Type', 'Shop', 'Client', 'Phone', 'Bill No',
+    'Debit', 'Credit', 'Payment Mode', 'Cheque No',
+]
+
+
+def ledger_rows(bills, payments):
+    """Bills and payments merged into one date-ordered ledger.
+
+    Both querysets are streamed with iterator(), so memory stays flat no
+    matter how long the date range is.
+    """
+    chunk_size = settings.EXPORT_CHUNK_SIZE
+    bill_rows = (
+        bills
+        .order_by('bill_date', 'id')
+        .values_list('bill_date', 'id', 'shop__name', 'client__name', 'client__phone', 'bill_number', 'total_amount')
+        .iterator(chunk_size=chunk_size)
+    )
+    payment_rows = (
+        payments
+        .order_by('payment_date', 'id')
+        .values_list(
+            'payment_date', 'id', 'shop__name', 'bill__client__name', 'bill__client__phone',
+            'bill__bill_number', 'amount', 'payment_mode', 'cheque_number',
+        )
+        .iterator(chunk_size=chunk_size)
+    )
+
+    bill_entries = (
+        (bill_date, 0, pk, [bill_date, 'Bill', shop, client, phone, number, total, None, '', ''])
+        for bill_date, pk, shop, client, phone, number, total in bill_rows
+    )
+    payment_entries = (
+        (paid_on, 1, pk, [paid_on, 'Payment', shop, client, phone, number, None, amount, mode, cheque or ''])
+        for paid_on, pk, shop, client, phone, number, amount, mode, cheque in payment_rows
+    )
+    # on the same day bills come before payments
+    for _, _, _, row in heapq.merge(bill_entries, payment_entries, key=lambda entry: entry[:3]):
+        yield row
+
+
+class Echo:
+    # csv.writer target that hands each formatted line straight back
+    def write(self, value):
+        return value
+
+
+def iter_csv(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(LEDGER_HEADER)
+    for row in rows:
+        yield writer.writerow(['' if value is None else value for value in row])
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Ledger" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_cell(value):
+    if value is None or value == '':
+        return '<c/>'
+    if isinstance(value, (int, float)):
+        return f'<c><v>{value}</v></c>'
+    return f'<c t="inlineStr"><is><t>{escape(str(value))}</t></is></c>'
+
+
+def _iter_sheet(rows, batch=500):
+    yield (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+    ).encode()
+    lines = ['<row>' + ''.join(_xlsx_cell(value) for value in LEDGER_HEADER) + '</row>']
+    for row in rows:
+        lines.append('<row>' + ''.join(_xlsx_cell(value) for value in row) + '</row>')
+        if len(lines) >= batch:
+            yield ''.join(lines).encode()
+            lines = []
+    lines.append('</sheetData></worksheet>')
+    yield ''.join(lines).encode()
+
+
+def iter_xlsx(rows):
+    """Minimal single-sheet XLSX (inline strings, no styles) written as a stream."""
+    return iter_zip([
+        ('[Content_Types].xml', XLSX_CONTENT_TYPES),
+        ('_rels/.rels', XLSX_ROOT_RELS),
+        ('xl/workbook.xml', XLSX_WORKBOOK),
+        ('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS),
+        ('xl/worksheets/sheet1.xml', _iter_sheet(rows)),
+    ])
+
+
+def ledger_querysets(shops=None, client=None, from_date=None, to_date=None):
+    bills = Bill.objects.all()
+    payments = Payment.objects.all()
+
+    if shops is not None:
+        bills = bills.filter(shop__in=shops)
+        payments = payments.filter(shop__in=shops)
+    if client is not None:
+        bills = bills.filter(client=client)
+        payments = payments.filter(bill__client=client)
+    if from_date:
+        bills = bills.filter(bill_date__gte=from_date)
+        payments = payments.filter(payment_date__gte=from_date)
+    if to_date:
+        bills = bills.filter(bill_date__lte=to_date)
+        payments = payments.filter(payment_date__lte=to_date)
+
+    return bills, payments
@@ -0,0 +1,293 @@
+import asyncio
+import bisect
+import math
+import threading
+import time
+import weakref
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+
+class CircuitBreaker:
+    """Fails calls fast after `failure_threshold` consecutive failures.
+
+    After `reset_timeout` seconds one trial call is let through (half-open);
+    its outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold, reset_timeout):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self.open_seconds = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half_open'
+        return 'open'
+
+    def retry_after(self):
+        if self.opened_at is None:
+            return 0
+        return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0)
+
+    def allow(self):
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half_open' and not self.trial_in_flight:
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                self.open_seconds += time.monotonic() - self.opened_at
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.trial_in_flight or self.failures >= self.failure_threshold:
+                now = time.monotonic()
+                if self.opened_at is not None:
+                    self.open_seconds += now - self.opened_at
+                self.opened_at = now
+            self.trial_in_flight = False
+
+    def total_open_seconds(self):
+        with self._lock:
+            current = time.monotonic() - self.opened_at if self.opened_at is not None else 0
+            return self.open_seconds + current
+
+
+class GatewayMetrics:
+    def __init__(self):
+        self.requests = 0
+        self.failures = 0
+        self.rejected = 0
+        self.latency_sum = 0.0
+        self.latency_buckets = [0] * (len(LATENCY_BUCKETS) + 1)
+        self._lock = threading.Lock()
+
+    def observe(self, seconds, failed):
+        with self._lock:
+            self.requests += 1
+            self.failures += int(failed)
+            self.latency_sum += seconds
+            self.latency_buckets[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+
+    def reject(self):
+        with self._lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'requests': self.requests,
+                'failures': self.failures,
+                'rejected': self.rejected,
+                'latency_sum': self.latency_sum,
+                'latency_buckets': list(self.latency_buckets),
+            }
+
+
+def no_reply(error):
+    # the request was sent, so the gateway may have delivered the message
+    return {"error": f"No reply from gateway: {error}", "unknown": True}
+
+
+class GatewayClient:
+    """Keep-alive client for the WhatsApp service in `whatsapp-services/`.
+
+    Methods return the gateway's JSON reply, or a dict with an "error" key
+    when the call failed or the circuit is open. If the request went out but
+    no reply came back in time the dict also has "unknown": the gateway may
+    still have sent the message.
+    """
+
+    def __init__(self, base_url, connect_timeout=3, read_timeout=15, pool_size=10,
+                 failure_threshold=5, reset_timeout=30, batch_size=50, concurrency=5):
+        self.base_url = base_url.rstrip('/')
+        self.batch_size = batch_size
+        self.concurrency = max(concurrency, 1)
+        self.pool_size = pool_size
+        self.timeout = (connect_timeout, read_timeout)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.metrics = GatewayMetrics()
+
+    def send_message(self, number, message):
+        return self.post('/send-message', {"number": number, "message": message})
+
+    def send_batch(self, messages):
+        """Send (number, message) pairs through `/send-messages` in chunks.
+
+        Returns one result dict per message, in the same order. The gateway
+        sends `concurrency` messages of a chunk at a time, so the read timeout
+        is scaled by the number of rounds the chunk takes.
+        """
+        connect_timeout, read_timeout = self.timeout
+        results = []
+        for start in range(0, len(messages), self.batch_size):
+            chunk = messages[start:start + self.batch_size]
+            rounds = math.ceil(len(chunk) / self.concurrency)
+            reply = self.post('/send-messages', {
+                "messages": [{"number": number, "message": message} for number, message in chunk]
+            }, timeout=(connect_timeout, read_timeout * rounds))
+            chunk_results = reply.get('results')
+
+            if 'error' in reply or not isinstance(chunk_results, list) or len(chunk_results) != len(chunk):
+                # the whole request failed, so every message in it did
+                error = dict(reply) if 'error' in reply else {"error": "Malformed batch reply from gateway"}
+                chunk_results = [dict(error) for _ in chunk]
+            results.extend(chunk_results)
+        return results
+
+    def post(self, path, payload, timeout=None):
+        if not self.breaker.allow():
+            return self.reject()
+
+        started = time.monotonic()
+        status_code = None
+        try:
+            response = self.session.post(f"{self.base_url}{path}", json=payload, timeout=timeout or self.timeout)
+            status_code = response.status_code
+            result = response.json()
+            if not response.ok and 'error' not in result:
+                result['error'] = f"HTTP {status_code}"
+        except requests.exceptions.ReadTimeout as e:
+            result = no_reply(e)
+        except Exception as e:
+            result = {"error": str(e)}
+        return self.record(started, status_code, result)
+
+    def reject(self):
+        self.metrics.reject()
+        return {
+            "error": "WhatsApp gateway circuit is open",
+            "circuit_open": True,
+            "retry_after": self.breaker.retry_after(),
+        }
+
+    def record(self, started, status_code, result):
+        self.metrics.observe(time.monotonic() - started, 'error' in result)
+        # a 4xx means the gateway is up but rejected this message
+        if 'error' in result and not (status_code and 400 <= status_code < 500):
+            self.breaker.record_failure()
+        else:
+            self.breaker.record_success()
+        return result
+
+    def render_metrics(self):
+        """Prometheus text exposition of the client's counters."""
+        snapshot = self.metrics.snapshot()
+        lines = [
+            '# TYPE whatsapp_gateway_requests_total counter',
+            f"whatsapp_gateway_requests_total {snapshot['requests']}",
+            '# TYPE whatsapp_gateway_failures_total counter',
+            f"whatsapp_gateway_failures_total {snapshot['failures']}",
+            '# TYPE whatsapp_gateway_rejected_total counter',
+            f"whatsapp_gateway_rejected_total {snapshot['rejected']}",
+            '# TYPE whatsapp_gateway_circuit_open_seconds_total counter',
+            f"whatsapp_gateway_circuit_open_seconds_total {self.breaker.total_open_seconds():.3f}",
+            '# TYPE whatsapp_gateway_circuit_open gauge',
+            f"whatsapp_gateway_circuit_open {int(self.breaker.state != 'closed')}",
+            '# TYPE whatsapp_gateway_latency_seconds histogram',
+        ]
+        cumulative = 0
+        for bound, count in zip(LATENCY_BUCKETS + ('+Inf',), snapshot['latency_buckets']):
+            cumulative += count
+            lines.append(f'whatsapp_gateway_latency_seconds_bucket{{le="{bound}"}} {cumulative}')
+        lines.append(f"whatsapp_gateway_latency_seconds_sum {snapshot['latency_sum']:.6f}")
+        lines.append(f"whatsapp_gateway_latency_seconds_count {snapshot['requests']}")
+        return "\n".join(lines) + "\n"
+
+
+class AsyncGatewayClient:
+    """Non-blocking sends for async views, sharing a GatewayClient's circuit
+    breaker and metrics so both agree on whether the gateway is up.
+
+    httpx clients belong to one event loop, so use get_async_gateway_client()
+    from inside the loop rather than keeping one of these around.
+    """
+
+    def __init__(self, client):
+        self.client = client
+        connect_timeout, read_timeout = client.timeout
+        self.http = httpx.AsyncClient(
+            base_url=client.base_url,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(max_connections=client.pool_size),
+        )
+
+    async def send_message(self, number, message):
+        return await self.post('/send-message', {"number": number, "message": message})
+
+    async def post(self, path, payload):
+        if not self.client.breaker.allow():
+            return self.client.reject()
+
+        started = time.monotonic()
+        status_code = None
+        try:
+            response = await self.http.post(path, json=payload)
+            status_code = response.status_code
+            result = response.json()
+            if not response.is_success and 'error' not in result:
+                result['error'] = f"HTTP {status_code}"
+        except httpx.ReadTimeout as e:
+            result = no_reply(e)
+        except Exception as e:
+            result = {"error": str(e)}
+        return self.client.record(started, status_code, result)
+
+
+_client = None
+_client_lock = threading.Lock()
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_gateway_client():
+    # one per event loop; uvicorn runs a single loop per worker process
+    loop = asyncio.get_running_loop()
+    if loop not in _async_clients:
+        _async_clients[loop] = AsyncGatewayClient(get_gateway_client())
+    return _async_clients[loop]
+
+
+def get_gateway_client():
+    global _client
+    with _client_lock:
+        if _client is None:
+            config = settings.WHATSAPP_GATEWAY
+            _client = GatewayClient(
+                config['URL'],
+                connect_timeout=config['CONNECT_TIMEOUT'],
+                read_timeout=config['READ_TIMEOUT'],
+                pool_size=config['POOL_SIZE'],
+                failure_threshold=config['FAILURE_THRESHOLD'],
+                reset_timeout=config['RESET_TIMEOUT'],
+                batch_size=config['BATCH_SIZE'],
+                concurrency=config['CONCURRENCY'],
+            )
+        return _client
@@ -0,0 +1,263 @@
+import csv
+import re
+from contextlib import nullcontext
+from datetime import date
+
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from .models import Bill, Client, DailyCollection, Payment, ShopCollectionSummary
+from .search import normalize_phone
+from .signals import bump_shop_data_version, bump_statement_version
+
+
+# bill_number, bill_date, due_date, client_phone and total_amount are required
+IMPORT_COLUMNS = (
+    'bill_number', 'bill_date', 'due_date', 'client_name', 'client_phone', 'client_address',
+    'total_amount', 'paid_amount', 'payment_mode', 'paid_date', 'sales_person',
+)
+REQUIRED_COLUMNS = ('bill_number', 'bill_date', 'due_date', 'client_phone', 'total_amount')
+# checked per row, so a long value is a row error rather than a DataError mid-import
+COLUMN_LENGTHS = {
+    'bill_number': Bill._meta.get_field('bill_number').max_length,
+    'client_name': Client._meta.get_field('name').max_length,
+    'client_phone': Client._meta.get_field('phone').max_length,
+}
+# the old billing system writes dates day first
+DAY_FIRST_DATE = re.compile(r'(\d{1,2})[/-](\d{1,2})[/-](\d{4})$')
+
+
+class ImportResult:
+    def __init__(self):
+        self.rows = 0
+        self.clients_created = 0
+        self.bills_created = 0
+        self.errors = []
+
+    def error(self, line, message):
+        self.errors.append((line, message))
+
+
+class RowError(ValueError):
+    pass
+
+
+def read_date(row, column):
+    value = (row.get(column) or '').strip()
+    try:
+        parsed = parse_date(value)
+        if not parsed:
+            match = DAY_FIRST_DATE.match(value)
+            if match:
+                day, month, year = map(int, match.groups())
+                parsed = date(year, month, day)
+    except ValueError:
+        parsed = None
+    if not parsed:
+        raise RowError(f"{column}: {value!r} is not a date (YYYY-MM-DD or DD/MM/YYYY)")
+    return parsed
+
+
+def read_amount(row, column, default=None):
+    value = (row.get(column) or '').strip().replace(',', '')
+    if not value and default is not None:
+        return default
+    try:
+        return float(value)
+    except ValueError:
+        raise RowError(f"{column}: {value!r} is not a number")
+
+
+def parse_row(row):
+    missing = [column for column in REQUIRED_COLUMNS if not (row.get(column) or '').strip()]
+    if missing:
+        raise RowError(f"missing {', '.join(missing)}")
+
+    bill_date = read_date(row, 'bill_date')
+    due_date = read_date(row, 'due_date')
+    # the opening payment's date; without one it counts as paid on the bill date
+    paid_date = read_date(row, 'paid_date') if (row.get('paid_date') or '').strip() else bill_date
+    total = read_amount(row, 'total_amount')
+    paid = read_amount(row, 'paid_amount', default=0.0)
+    payment_mode = (row.get('payment_mode') or 'cash').strip().lower()
+
+    if due_date < bill_date:
+        raise RowError("due_date is before bill_date")
+    if paid_date < bill_date:
+        raise RowError("paid_date is before bill_date")
+    if total <= 0:
+        raise RowError("total_amount must be positive")
+    if not 0 <= paid <= total:
+        raise RowError("paid_amount must be between 0 and total_amount")
+    if payment_mode not in dict(Payment.PAYMENT_CHOICES):
+        raise RowError(f"payment_mode: {payment_mode!r} is not cash or cheque")
+
+    values = {
+        'bill_number': row['bill_number'].strip(),
+        'bill_date': bill_date,
+        'due_date': due_date,
+        'client_name': (row.get('client_name') or '').strip(),
+        'client_phone': row['client_phone'].strip(),
+        'client_address': (row.get('client_address') or '').strip(),
+        'total_amount': total,
+        'paid_amount': paid,
+        'payment_mode': payment_mode,
+        'paid_date': paid_date,
+        'sales_person': (row.get('sales_person') or '').strip(),
+    }
+    for column, limit in COLUMN_LENGTHS.items():
+        if len(values[column]) > limit:
+            raise RowError(f"{column}: longer than {limit} characters")
+    # clients are matched on the phone's digits, so a phone without any would
+    # match every other such client
+    if not normalize_phone(values['client_phone']):
+        raise RowError(f"client_phone: {values['client_phone']!r} has no digits")
+    return values
+
+
+def import_bills(shop, lines, batch_size=1000, dry_run=False):
+    """Import clients and bills for `shop` from CSV text lines.
+
+    The file is read in batches of `batch_size` rows. Each batch needs one
+    query for its clients (matched by normalized phone), one for duplicate bill
+    numbers and one for sales people, then bulk inserts in its own
+    transaction. Bad rows are reported with their line number and skipped;
+    the rest of the file still goes in. Paid amounts become one opening
+    payment per bill, dated paid_date or else the bill date, so later
+    payment edits keep them.
+    """
+    result = ImportResult()
+    reader = csv.DictReader(lines)
+    missing = [column for column in REQUIRED_COLUMNS if column not in (reader.fieldnames or ())]
+    if missing:
+        result.error(1, f"header is missing {', '.join(missing)}")
+        return result
+
+    touched_clients = set()
+    seen_numbers = set()
+    sales_people = {}
+
+    # a dry run validates inside one transaction and rolls it back; a real
+    # import commits batch by batch so a huge file never holds one long lock
+    with transaction.atomic() if dry_run else nullcontext():
+        batch = []
+        try:
+            for row in reader:
+                result.rows += 1
+                batch.append((reader.line_num, row))
+                if len(batch) >= batch_size:
+                    _import_batch(shop, batch, result, seen_numbers, sales_people, touched_clients)
+                    batch = []
+        except csv.Error as e:
+            # the rest of the file cannot be split into rows reliably
+            result.error(reader.line_num, f"unreadable CSV, stopped here: {e}")
+        if batch:
+            _import_batch(shop, batch, result, seen_numbers, sales_people, touched_clients)
+
+        if dry_run:
+            transaction.set_rollback(True)
+        else:
+            # bulk_create skips Bill.save() and the signals, so catch up once
+            ShopCollectionSummary.rebuild(shop.id, timezone.localdate())
+            bump_statement_version(touched_clients)
+            bump_shop_data_version([shop.id])
+
+    return result
+
+
+def _import_batch(shop, batch, result, seen_numbers, sales_people, touched_clients):
+    parsed = []
+    for line, row in batch:
+        try:
+            values = parse_row(row)
+        except RowError as e:
+            result.error(line, str(e))
+            continue
+        if values['bill_number'] in seen_numbers:
+            result.error(line, f"bill {values['bill_number']} appears twice in the file")
+            continue
+        seen_numbers.add(values['bill_number'])
+        parsed.append((line, values))
+
+    existing_numbers = set(
+        Bill.objects.for_shop(shop)
+        .filter(bill_number__in=[values['bill_number'] for _, values in parsed])
+        .values_list('bill_number', flat=True)
+    )
+
+    usernames = {values['sales_person'] for _, values in parsed if values['sales_person']} - sales_people.keys()
+    if usernames:
+        found = dict(User.objects.filter(username__in=usernames).values_list('username', 'id'))
+        for username in usernames:
+            sales_people[username] = found.get(username)
+
+    # normalized phone -> client id, so "+91 98765 43210" finds 9876543210;
+    # the oldest client wins if a phone is shared
+    clients = {}
+    for phone, client_id in (
+        Client.objects.for_shop(shop)
+        .filter(phone_digits__in={normalize_phone(values['client_phone']) for _, values in parsed})
+        .order_by('-id')
+        .values_list('phone_digits', 'id')
+    ):
+        clients[phone] = client_id
+
+    rows = []
+    new_clients = {}
+    for line, values in parsed:
+        if values['bill_number'] in existing_numbers:
+            result.error(line, f"bill {values['bill_number']} already exists")
+            continue
+        if values['sales_person'] and sales_people[values['sales_person']] is None:
+            result.error(line, f"sales_person: no user {values['sales_person']!r}")
+            continue
+        phone = normalize_phone(values['client_phone'])
+        if phone not in clients and phone not in new_clients:
+            if not values['client_name']:
+                result.error(line, f"no client with phone {values['client_phone']}; client_name is needed to create one")
+                continue
+            new_clients[phone] = Client(
+                shop=shop,
+                name=values['client_name'],
+                phone=values['client_phone'],
+                address=values['client_address'],
+            )
+        rows.append(values)
+
+    with transaction.atomic():
+        clients.update({client.phone_digits: client.id for client in Client.objects.bulk_create(new_clients.values())})
+        result.clients_created += len(new_clients)
+
+        bills = Bill.objects.bulk_create([
+            Bill(
+                shop=shop,
+                client_id=clients[normalize_phone(values['client_phone'])],
+                sales_person_id=sales_people.get(values['sales_person']),
+                bill_number=values['bill_number'],
+                bill_date=values['bill_date'],
+                due_date=values['due_date'],
+                total_amount=values['total_amount'],
+                paid_amount=values['paid_amount'],
+                is_open=values['paid_amount'] < values['total_amount'],
+            )
+            for values in rows
+        ])
+        result.bills_created += len(bills)
+
+        payments = Payment.objects.bulk_create([
+            Payment(
+                shop=shop,
+                bill=bill,
+                sales_person_id=bill.sales_person_id,
+                amount=values['paid_amount'],
+                payment_mode=values['payment_mode'],
+                payment_date=values['paid_date'],
+            )
+            for bill, values in zip(bills, rows)
+            if values['paid_amount'] > 0
+        ])
+        DailyCollection.record_payments(payments)
+
+    touched_clients.update(bill.client_id for bill in bills)
@@ -0,0 +1,238 @@
+import contextvars
+import logging
+import os
+import random
+import re
+import threading
+import time
+from collections import Counter, deque
+from contextlib import ExitStack
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from django.template.backends.django import Template
+
+
+logger = logging.getLogger(__name__)
+
+WORKERS_KEY = 'instrumentation:workers'
+# collapse "IN (%s, %s, ...)" of any length so the same query shape groups together
+IN_LIST = re.compile(r'\((?:%s, )+%s\)')
+NUMBER = re.compile(r'\b\d+\b')
+
+_current = contextvars.ContextVar('request_metrics', default=None)
+
+
+class RequestMetrics:
+    def __init__(self, sampled):
+        self.sampled = sampled
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.template_seconds = 0.0
+        self.template_depth = 0
+        self.shapes = Counter()
+        self.started = time.perf_counter()
+
+    def repeated_shapes(self, limit):
+        return [(shape, count) for shape, count in self.shapes.most_common(limit) if count > 1]
+
+
+def _record_query(execute, sql, params, many, context):
+    metrics = _current.get()
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        if metrics is not None:
+            metrics.queries += 1
+            metrics.db_seconds += time.perf_counter() - started
+            metrics.shapes[NUMBER.sub('N', IN_LIST.sub('(...)', sql))] += 1
+
+
+_original_render = Template.render
+
+
+def _timed_render(self, context=None, request=None):
+    metrics = _current.get()
+    if metrics is None or not metrics.sampled:
+        return _original_render(self, context, request)
+    # includes rendered through get_template() nest; only the outer render counts
+    metrics.template_depth += 1
+    started = time.perf_counter()
+    try:
+        return _original_render(self, context, request)
+    finally:
+        metrics.template_depth -= 1
+        if not metrics.template_depth:
+            metrics.template_seconds += time.perf_counter() - started
+
+
+class ViewStats:
+    """Recent timings per view, kept in this process.
+
+    Each worker process keeps the last `window` requests of every view and
+    copies them into the cache every `flush_seconds`, so the performance
+    page can merge all workers when the cache is shared (CACHE_BACKEND=file).
+    """
+
+    def __init__(self, window, flush_seconds):
+        self.window = window
+        self.flush_seconds = flush_seconds
+        self.samples = {}
+        self.flushed_at = 0.0
+        self._lock = threading.Lock()
+
+    def add(self, view, total_ms, metrics):
+        sample = (
+            total_ms,
+            metrics.db_seconds * 1000 if metrics.sampled else None,
+            metrics.queries if metrics.sampled else None,
+            metrics.template_seconds * 1000 if metrics.sampled else None,
+        )
+        with self._lock:
+            self.samples.setdefault(view, deque(maxlen=self.window)).append(sample)
+            due = time.monotonic() - self.flushed_at >= self.flush_seconds
+            if due:
+                self.flushed_at = time.monotonic()
+        if due:
+            self.flush()
+
+    def snapshot(self):
+        with self._lock:
+            return {view: list(samples) for view, samples in self.samples.items()}
+
+    def flush(self):
+        timeout = self.flush_seconds * 10
+        cache.set(f"instrumentation:{os.getpid()}", self.snapshot(), timeout)
+        workers = set(cache.get(WORKERS_KEY) or ())
+        if os.getpid() not in workers:
+            cache.set(WORKERS_KEY, workers | {os.getpid()}, timeout)
+
+
+def _percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+def view_percentiles(stats):
+    """Per-view rows for the performance page, merged across worker processes."""
+    merged = {}
+    # this process's live samples replace its own flushed copy
+    others = [pid for pid in cache.get(WORKERS_KEY) or () if pid != os.getpid()]
+    snapshots = list(cache.get_many([f"instrumentation:{pid}" for pid in others]).values())
+    for snapshot in snapshots + [stats.snapshot()]:
+        for view, samples in (snapshot or {}).items():
+            merged.setdefault(view, []).extend(samples)
+
+    rows = []
+    for view, samples in merged.items():
+        totals = [sample[0] for sample in samples]
+        sampled = [sample for sample in samples if sample[2] is not None]
+        row = {
+            'view': view,
+            'requests': len(samples),
+            'p50': _percentile(totals, 0.5),
+            'p90': _percentile(totals, 0.9),
+            'p99': _percentile(totals, 0.99),
+            'sampled': len(sampled),
+            'db_p90': None,
+            'queries_avg': None,
+            'queries_max': None,
+            'template_p90': None,
+        }
+        if sampled:
+            row['db_p90'] = _percentile([sample[1] for sample in sampled], 0.9)
+            row['queries_avg'] = sum(sample[2] for sample in sampled) / len(sampled)
+            row['queries_max'] = max(sample[2] for sample in sampled)
+            row['template_p90'] = _percentile([sample[3] for sample in sampled], 0.9)
+        rows.append(row)
+    return sorted(rows, key=lambda row: row['p90'], reverse=True)
+
+
+class RequestMetricsMiddleware:
+    """Query count, DB time and template time for a sample of requests.
+
+    Every request gets its total time recorded and a Server-Timing header;
+    a SAMPLE_RATE share of requests is also instrumented at the database
+    and template level. Slow or query-heavy sampled requests are logged
+    with their most repeated query shapes, which is where N+1s show up.
+    Work done while a streamed response is being sent is not counted.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        config = settings.INSTRUMENTATION
+        self.sample_rate = config['SAMPLE_RATE']
+        self.slow_ms = config['SLOW_REQUEST_MS']
+        self.max_queries = config['MAX_QUERIES']
+        self.top_shapes = config['TOP_QUERY_SHAPES']
+        RequestMetricsMiddleware.stats = ViewStats(config['WINDOW'], config['FLUSH_SECONDS'])
+        Template.render = _timed_render
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        metrics = RequestMetrics(sampled=random.random() < self.sample_rate)
+        token = _current.set(metrics)
+        try:
+            with self.instrument(metrics):
+                response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    async def __acall__(self, request):
+        metrics = RequestMetrics(sampled=random.random() < self.sample_rate)
+        token = _current.set(metrics)
+        # connections are per thread, so wrap the ones on the thread the ORM runs on
+        stack = await sync_to_async(self.instrument)(metrics) if metrics.sampled else ExitStack()
+        try:
+            response = await self.get_response(request)
+        finally:
+            if metrics.sampled:
+                await sync_to_async(stack.close)()
+            _current.reset(token)
+        return self.finish(request, response, metrics)
+
+    def instrument(self, metrics):
+        stack = ExitStack()
+        if metrics.sampled:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(_record_query))
+        return stack
+
+    def finish(self, request, response, metrics):
+        total_ms = (time.perf_counter() - metrics.started) * 1000
+
+        timings = [f"total;dur={total_ms:.1f}"]
+        if metrics.sampled:
+            timings.append(f'db;dur={metrics.db_seconds * 1000:.1f};desc="{metrics.queries} queries"')
+            timings.append(f"tpl;dur={metrics.template_seconds * 1000:.1f}")
+        response['Server-Timing'] = ", ".join(timings)
+
+        match = getattr(request, 'resolver_match', None)
+        view = match.view_name if match else 'unresolved'
+        self.stats.add(view, total_ms, metrics)
+
+        if total_ms > self.slow_ms or (metrics.sampled and metrics.queries > self.max_queries):
+            self.log_slow(request, view, total_ms, metrics)
+        return response
+
+    def log_slow(self, request, view, total_ms, metrics):
+        message = f"Slow request {request.method} {request.path} ({view}): {total_ms:.0f} ms"
+        if metrics.sampled:
+            message += (
+                f", {metrics.queries} queries in {metrics.db_seconds * 1000:.0f} ms, "
+                f"templates {metrics.template_seconds * 1000:.0f} ms"
+            )
+            for shape, count in metrics.repeated_shapes(self.top_shapes):
+                message += f"\n  {count}x {shape}"
+        logger.warning(message)
@@ -0,0 +1,95 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.models import Count
+from django.test import Client as TestClient
+from django.urls import reverse
+
+from sales.benchmarks import measure, scratch_database
+from sales.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Time the dashboard and statement views on a generated dataset in a scratch "
+        "database of the configured backend. Run once with SQLite and once with "
+        "DATABASE_URL set, then compare the two --output files with --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--clients', type=int, default=200, help="Clients in the generated shop.")
+        parser.add_argument('--bills', type=int, default=5000, help="Bills in the generated shop.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--repeat', type=int, default=20, help="Timed requests per view.")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+        parser.add_argument('--compare', nargs=2, metavar=('BASELINE', 'CANDIDATE'),
+                            help="Compare two --output files instead of running.")
+        parser.add_argument('--keepdb', action='store_true', help="Keep the scratch database afterwards.")
+
+    def handle(self, *args, **options):
+        if options['compare']:
+            return self.compare(*options['compare'])
+
+        vendor = connection.vendor
+        self.stdout.write(f"Benchmarking on {vendor} ({options['clients']} clients, {options['bills']} bills)")
+
+        with scratch_database(keep=options['keepdb']):
+            [shop] = generate_dataset(
+                shops=1,
+                clients=options['clients'],
+                bills=options['bills'],
+                seed=options['seed'],
+            )
+            client = shop.client_set.annotate(bill_count=Count('bill')).order_by('-bill_count', 'id').first()
+
+            browser = TestClient()
+            browser.force_login(shop.owner)
+            urls = {
+                'dashboard': reverse('dashboard'),
+                'dashboard (streamed)': reverse('dashboard') + '?stream=1',
+                'client statement': reverse('client_statement', args=[client.id]),
+            }
+            results = {
+                'vendor': vendor,
+                'clients': options['clients'],
+                'bills': options['bills'],
+                'seed': options['seed'],
+                'views': {name: measure(browser, url, repeat=options['repeat']) for name, url in urls.items()},
+            }
+
+        for name, result in results['views'].items():
+            self.stdout.write(
+                f"{name:22} median {result['median_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  "
+                f"{result['queries']} queries"
+            )
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def compare(self, baseline_path, candidate_path):
+        try:
+            with open(baseline_path) as f:
+                baseline = json.load(f)
+            with open(candidate_path) as f:
+                candidate = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"Could not read results: {e}")
+
+        for key in ('clients', 'bills', 'seed'):
+            if baseline[key] != candidate[key]:
+                self.stdout.write(self.style.WARNING(
+                    f"Datasets differ ({key}: {baseline[key]} vs {candidate[key]}); timings are not comparable"
+                ))
+
+        self.stdout.write(f"{'view':22} {baseline['vendor']:>12} {candidate['vendor']:>12}  ratio")
+        for name, before in baseline['views'].items():
+            after = candidate['views'].get(name)
+            if after is None:
+                continue
+            ratio = after['median_ms'] / before['median_ms'] if before['median_ms'] else 0
+            self.stdout.write(
+                f"{name:22} {before['median_ms']:9.1f} ms {after['median_ms']:9.1f} ms  {ratio:.2f}x"
+            )
@@ -0,0 +1,141 @@
+import json
+import uuid
+
+from django.contrib import admin
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count, F
+from django.test import Client as TestClient
+from django.urls import reverse
+
+from sales import urls as sales_urls
+from sales.benchmarks import measure, scratch_database
+from sales.dataset import generate_dataset
+from sales.models import Bill
+
+
+def _payment_form():
+    return {'paid_now': '1', 'payment_mode': 'cash', 'idempotency_key': uuid.uuid4().hex}
+
+
+def _payment_json():
+    return json.dumps({'amount': 1, 'payment_mode': 'cash', 'idempotency_key': uuid.uuid4().hex})
+
+
+# how to call each URL in sales/urls.py: (method, URL kwargs, query string, data)
+SALES_REQUESTS = {
+    'dashboard': ('get', {}, '', None),
+    'mark_as_paid': ('post', {'bill_id': 'bill'}, '', _payment_form),
+    'api_record_payment': ('post', {'bill_id': 'bill'}, '', _payment_json),
+    'api_open_bills': ('get', {}, '?bucket=overdue', None),
+    'api_client_summary': ('get', {}, '', None),
+    'api_client_search': ('get', {}, '?q=ra', None),
+    'api_client_statement': ('get', {'client_id': 'client'}, '', None),
+    'api_collection_trends': ('get', {}, '?period=day&group=sales_person', None),
+    'client_summary': ('get', {}, '', None),
+    'client_bills': ('get', {'client_id': 'client'}, '', None),
+    'client_statement': ('get', {'client_id': 'client'}, '', None),
+    'client_statement_pdf': ('get', {'client_id': 'client'}, '', None),
+    'send_reminder': ('post', {'bill_id': 'bill'}, '', None),
+    'collection_trends': ('get', {}, '', None),
+    'request_performance': ('get', {}, '', None),
+    'aging_report': ('get', {}, '', None),
+    'ledger_export': ('get', {'file_format': 'csv'}, '', None),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Time every URL in sales/urls.py and every admin changelist at several data sizes "
+        "in a scratch database, and fail if a view's query count grows with the data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='200,2000',
+                            help="Comma-separated bills per shop to benchmark at (default 200,2000).")
+        parser.add_argument('--repeat', type=int, default=3, help="Timed requests per view and size.")
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--warm-cache', action='store_true',
+                            help="Keep the cache between requests (default: measure the uncached path).")
+        parser.add_argument('--output', help="Write the results as JSON to this file.")
+
+    def handle(self, *args, **options):
+        try:
+            sizes = sorted({int(size) for size in options['sizes'].split(',')})
+        except ValueError:
+            raise CommandError("--sizes must be comma-separated integers")
+
+        missing = [
+            pattern.name for pattern in sales_urls.urlpatterns
+            if pattern.name not in SALES_REQUESTS
+        ]
+        if missing:
+            raise CommandError(f"No benchmark request defined for: {', '.join(missing)}")
+
+        before = None if options['warm_cache'] else cache.clear
+        results = {}
+        with scratch_database():
+            for index, size in enumerate(sizes):
+                self.stdout.write(f"Generating {size} bills...")
+                [shop] = generate_dataset(
+                    shops=1,
+                    clients=max(size // 10, 5),
+                    bills=size,
+                    seed=options['seed'] + index,
+                    prefix=f"views{size}",
+                )
+                User.objects.filter(pk=shop.owner_id).update(is_staff=True, is_superuser=True)
+                browser = TestClient()
+                browser.force_login(shop.owner)
+
+                for name, (method, url, data) in self.requests(shop).items():
+                    result = measure(browser, url, repeat=options['repeat'], method=method, data=data, before=before)
+                    results.setdefault(name, {})[size] = result
+
+        self.report(results, sizes)
+
+        if options['output']:
+            with open(options['output'], 'w') as output:
+                json.dump(results, output, indent=2)
+
+        growing = [
+            f"{name} ({by_size[sizes[0]]['queries']} -> {by_size[sizes[-1]]['queries']} queries)"
+            for name, by_size in results.items()
+            if by_size[sizes[-1]]['queries'] > by_size[sizes[0]]['queries']
+        ]
+        if growing:
+            raise CommandError("Query count grows with data size: " + "; ".join(growing))
+        self.stdout.write(self.style.SUCCESS("No view's query count grows with data size"))
+
+    def requests(self, shop):
+        client = shop.client_set.annotate(bill_count=Count('bill')).order_by('-bill_count', 'id').first()
+        bill = (
+            Bill.objects.for_shop(shop)
+            .filter(is_open=True)
+            .order_by(F('paid_amount') - F('total_amount'), 'id')
+            .first()
+        )
+        targets = {'client': client.id, 'bill': bill.id}
+
+        requests = {}
+        for pattern in sales_urls.urlpatterns:
+            method, kwargs, query, data = SALES_REQUESTS[pattern.name]
+            kwargs = {key: targets.get(value, value) for key, value in kwargs.items()}
+            requests[pattern.name] = (method, reverse(pattern.name, kwargs=kwargs) + query, data)
+
+        for model in admin.site._registry:
+            opts = model._meta
+            requests[f"admin:{opts.app_label}.{opts.model_name}"] = (
+                'get', reverse(f'admin:{opts.app_label}_{opts.model_name}_changelist'), None,
+            )
+        return requests
+
+    def report(self, results, sizes):
+        header = f"{'view':32}" + "".join(f"{f'{size} bills':>22}" for size in sizes)
+        self.stdout.write(header)
+        for name, by_size in results.items():
+            self.stdout.write(f"{name:32}" + "".join(
+                f"{by_size[size]['median_ms']:>11.1f} ms {by_size[size]['queries']:>4} q"
+                for size in sizes
+            ))
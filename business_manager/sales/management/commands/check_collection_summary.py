@@ -0,0 +1,68 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sales.models import Shop, ShopCollectionSummary
+
+
+FIELDS = (
+    'pending_total',
+    'overdue_total',
+    'today_total',
+    'upcoming_total',
+    'overdue_count',
+    'today_count',
+    'upcoming_count',
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare stored collection summaries against a full recompute from the bills, "
+        "as of each summary's own date. Shops without a summary, or with one from an "
+        "earlier day, are listed but are not errors: the dashboard rebuilds those on demand."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true',
+                            help="Rebuild summaries that do not match, and bring missing or stale ones up to date.")
+        parser.add_argument('--tolerance', type=float, default=0.01,
+                            help="Allowed difference for amount totals (float rounding).")
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        stored = {s.shop_id: s for s in ShopCollectionSummary.objects.all()}
+        mismatched = []
+        outdated = []
+
+        for shop_id in Shop.objects.values_list('id', flat=True).iterator():
+            summary = stored.get(shop_id)
+            if summary is None or summary.as_of != today:
+                outdated.append(shop_id)
+                note = "no summary yet" if summary is None else f"summary as of {summary.as_of}"
+                self.stdout.write(f"Shop {shop_id}: {note}")
+            if summary is None:
+                continue
+
+            # a summary is only updated on its own day, so check it against that day
+            expected = ShopCollectionSummary.compute(shop_id, summary.as_of)
+            problems = [
+                f"{field}: stored {getattr(summary, field)} != computed {expected[field]}"
+                for field in FIELDS
+                if abs(getattr(summary, field) - expected[field]) > options['tolerance']
+            ]
+            if problems:
+                mismatched.append(shop_id)
+                self.stdout.write(self.style.WARNING(f"Shop {shop_id}: " + "; ".join(problems)))
+
+        if options['fix']:
+            for shop_id in sorted(set(mismatched) | set(outdated)):
+                ShopCollectionSummary.rebuild(shop_id, today)
+        elif mismatched:
+            raise CommandError(f"{len(mismatched)} shop summary(ies) do not match their bills")
+
+        if mismatched:
+            self.stdout.write(self.style.SUCCESS(f"Rebuilt {len(mismatched)} shop summary(ies)"))
+        else:
+            self.stdout.write(self.style.SUCCESS("All shop summaries match"))
+        if options['fix'] and outdated:
+            self.stdout.write(f"Brought {len(outdated)} missing or stale summary(ies) up to date")
@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.models import Shop
+from sales.statement_export import iter_statements_zip
+
+
+class Command(BaseCommand):
+    help = "Render every client statement of a shop in parallel into one ZIP file."
+
+    def add_arguments(self, parser):
+        parser.add_argument('shop_id', type=int)
+        parser.add_argument('output', help="Path of the ZIP file to write.")
+        parser.add_argument('--from', dest='from_date', help="Only bills dated on or after YYYY-MM-DD.")
+        parser.add_argument('--to', dest='to_date', help="Only bills dated on or before YYYY-MM-DD.")
+        parser.add_argument('--workers', type=int, help="Renderer processes (default: STATEMENT_EXPORT_WORKERS or CPU count).")
+
+    def handle(self, *args, **options):
+        shop = Shop.objects.filter(id=options['shop_id']).first()
+        if shop is None:
+            raise CommandError(f"Shop {options['shop_id']} does not exist")
+
+        started = time.perf_counter()
+        timings = []
+        with open(options['output'], 'wb') as output:
+            for chunk in iter_statements_zip(
+                shop,
+                from_date=options['from_date'],
+                to_date=options['to_date'],
+                workers=options['workers'],
+                timings=timings,
+            ):
+                output.write(chunk)
+
+        for name, seconds in timings:
+            self.stdout.write(f"{name}: {seconds * 1000:.1f} ms")
+        self.stdout.write(self.style.SUCCESS(
+            f"Wrote {len(timings)} statement(s) to {options['output']} in {time.perf_counter() - started:.2f}s"
+        ))
@@ -0,0 +1,39 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sales.dataset import generate_dataset
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic dataset: shops with their owners, sales people, "
+        "clients, bills with a mix of due dates, and full or partial payments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shops', type=int, default=1)
+        parser.add_argument('--clients', type=int, default=50, help="Clients per shop.")
+        parser.add_argument('--bills', type=int, default=500, help="Bills per shop.")
+        parser.add_argument('--payments', type=int, default=2, help="Most payments on one paid or part-paid bill.")
+        parser.add_argument('--sales-people', type=int, default=3, help="Sales people per shop.")
+        parser.add_argument('--seed', type=int, default=42, help="The same seed always gives the same data.")
+        parser.add_argument('--prefix', default='demo', help="Prefix of the generated usernames.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        shops = generate_dataset(
+            shops=options['shops'],
+            clients=options['clients'],
+            bills=options['bills'],
+            payments=options['payments'],
+            sales_people=options['sales_people'],
+            seed=options['seed'],
+            prefix=options['prefix'],
+        )
+        for shop in shops:
+            self.stdout.write(f"Shop {shop.id}: {shop.name} (owner {shop.owner.username}, no password set)")
+        self.stdout.write(self.style.SUCCESS(
+            f"Generated {len(shops)} shop(s) with {options['clients']} client(s) and {options['bills']} bill(s) each "
+            f"in {time.perf_counter() - started:.2f}s"
+        ))
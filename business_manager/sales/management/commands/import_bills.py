@@ -0,0 +1,49 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.imports import IMPORT_COLUMNS, import_bills
+from sales.models import Shop
+
+
+class Command(BaseCommand):
+    help = (
+        "Import clients and bills into a shop from a CSV file with the columns "
+        + ", ".join(IMPORT_COLUMNS) + "."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('shop_id', type=int)
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=1000, help="Rows inserted per transaction.")
+        parser.add_argument('--dry-run', action='store_true', help="Validate the file without saving anything.")
+        parser.add_argument('--errors', help="Write rejected rows (line, error) to this CSV file.")
+
+    def handle(self, *args, **options):
+        shop = Shop.objects.filter(id=options['shop_id']).first()
+        if shop is None:
+            raise CommandError(f"Shop {options['shop_id']} does not exist")
+
+        started = time.perf_counter()
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as lines:
+                result = import_bills(shop, lines, batch_size=options['batch_size'], dry_run=options['dry_run'])
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if options['errors']:
+            with open(options['errors'], 'w', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(['line', 'error'])
+                writer.writerows(result.errors)
+        else:
+            for line, message in result.errors:
+                self.stdout.write(self.style.WARNING(f"Line {line}: {message}"))
+
+        prefix = "Dry run: would import" if options['dry_run'] else "Imported"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {result.bills_created} bill(s) and {result.clients_created} new client(s) "
+            f"from {result.rows} row(s) in {time.perf_counter() - started:.2f}s; "
+            f"{len(result.errors)} row(s) rejected"
+        ))
@@ -0,0 +1,202 @@
+import os
+import socket
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer
+
+import requests
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import Client as TestClient
+from django.utils.crypto import get_random_string
+from django.db.models import Min
+from django.utils import timezone
+
+from sales.models import Bill, OutboundMessage, ReminderLog
+from sales.management.commands.run_stub_gateway import StubGatewayHandler
+
+
+# "METHOD /path/"; a bare path is a GET
+DEFAULT_PATHS = ['POST /send-reminder/{bill}/', '/dashboard/?stream=0']
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def _method_and_path(spec):
+    method, _, path = spec.rpartition(' ')
+    return (method or 'GET').upper(), path
+
+
+def _percentile(timings, fraction):
+    return timings[min(int(len(timings) * fraction), len(timings) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the web process in WSGI (gthread) and ASGI (uvicorn) mode with the same "
+        "gunicorn.conf.py, against a stub WhatsApp gateway with a set latency. Runs against the "
+        "configured database; the reminders it queues are deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help="User whose session the requests use (must own overdue bills).")
+        parser.add_argument('--modes', default='wsgi,asgi', help="Comma-separated server modes (default wsgi,asgi).")
+        parser.add_argument('--path', action='append', dest='paths',
+                            help="Path to load, repeatable, optionally after a method (\"POST /path/\"); "
+                                 "{bill} becomes an overdue bill id. "
+                                 f"Default: {', '.join(DEFAULT_PATHS)}.")
+        parser.add_argument('--requests', type=int, default=200, help="Requests per path and mode.")
+        parser.add_argument('--concurrency', type=int, default=32, help="Requests in flight at once.")
+        parser.add_argument('--workers', type=int, default=2, help="Gunicorn worker processes.")
+        parser.add_argument('--threads', type=int, default=4, help="Threads per worker in WSGI mode.")
+        parser.add_argument('--gateway-latency', type=float, default=0.5,
+                            help="Seconds the stub gateway takes per message (default 0.5).")
+
+    def handle(self, *args, **options):
+        user = User.objects.filter(username=options['username']).first()
+        if user is None:
+            raise CommandError(f"No user {options['username']!r}")
+        # one overdue bill per client, so reminders are not held back by the
+        # outbox's per-recipient rate limit
+        bill_ids = list(
+            Bill.objects.for_user(user)
+            .filter(is_open=True, due_date__lt=timezone.localdate())
+            .values('client_id')
+            .annotate(bill_id=Min('id'))
+            .order_by('client_id')
+            .values_list('bill_id', flat=True)[:options['requests']]
+        )
+        paths = options['paths'] or DEFAULT_PATHS
+        if not bill_ids and any('{bill}' in path for path in paths):
+            raise CommandError(f"{user} has no overdue bill to send reminders for")
+
+        test_client = TestClient()
+        test_client.force_login(user)
+        # POSTs send the CSRF cookie's value back in the header, as a browser form would
+        csrf_token = get_random_string(32)
+        cookies = {
+            settings.SESSION_COOKIE_NAME: test_client.cookies[settings.SESSION_COOKIE_NAME].value,
+            settings.CSRF_COOKIE_NAME: csrf_token,
+        }
+        headers = {'X-CSRFToken': csrf_token}
+
+        StubGatewayHandler.latency = options['gateway_latency']
+        gateway = ThreadingHTTPServer(('127.0.0.1', _free_port()), StubGatewayHandler)
+        gateway.daemon_threads = True
+        threading.Thread(target=gateway.serve_forever, daemon=True).start()
+
+        last_message = OutboundMessage.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        last_log = ReminderLog.objects.order_by('-id').values_list('id', flat=True).first() or 0
+        results = []
+        try:
+            for mode in options['modes'].split(','):
+                with self.server(mode, options, f"http://127.0.0.1:{gateway.server_address[1]}") as base_url:
+                    for path in paths:
+                        sent_before = StubGatewayHandler.counts['messages']
+                        results.append(self.load(mode, base_url, path, bill_ids, cookies, headers, options))
+                        results[-1]['gateway_messages'] = StubGatewayHandler.counts['messages'] - sent_before
+        finally:
+            gateway.shutdown()
+            OutboundMessage.objects.filter(id__gt=last_message).delete()
+            ReminderLog.objects.filter(id__gt=last_log).delete()
+
+        self.stdout.write(
+            f"{options['requests']} requests per row, {options['concurrency']} in flight, "
+            f"{options['workers']} worker(s), gateway latency {options['gateway_latency']}s"
+        )
+        self.stdout.write(
+            f"{'mode':<5} {'path':<32} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} "
+            f"{'errors':>7} {'sent':>6}"
+        )
+        for row in results:
+            self.stdout.write(
+                f"{row['mode']:<5} {row['path']:<32} {row['rps']:>8.1f} {row['p50']:>9.1f} {row['p95']:>9.1f} "
+                f"{row['p99']:>9.1f} {row['errors']:>7} {row['gateway_messages']:>6}"
+            )
+
+    @contextmanager
+    def server(self, mode, options, gateway_url):
+        port = _free_port()
+        env = {
+            **os.environ,
+            'SERVER_MODE': mode,
+            'PORT': str(port),
+            'WEB_CONCURRENCY': str(options['workers']),
+            'GUNICORN_THREADS': str(options['threads']),
+            'WHATSAPP_GATEWAY_URL': gateway_url,
+        }
+        process = subprocess.Popen(
+            [sys.executable, '-m', 'gunicorn', '--config', 'gunicorn.conf.py',
+             '--pythonpath', str(settings.BASE_DIR), '--access-logfile', os.devnull],
+            cwd=settings.BASE_DIR.parent,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+        )
+        base_url = f"http://127.0.0.1:{port}"
+        try:
+            deadline = time.monotonic() + 30
+            while True:
+                if process.poll() is not None:
+                    raise CommandError(f"gunicorn ({mode}) exited:\n{process.stderr.read().decode()}")
+                if time.monotonic() > deadline:
+                    raise CommandError(f"gunicorn ({mode}) did not start within 30s")
+                try:
+                    requests.get(base_url + '/admin/login/', timeout=1)
+                    break
+                except (requests.ConnectionError, requests.Timeout):
+                    # not listening yet, or still loading the app
+                    time.sleep(0.2)
+            self.stdout.write(f"{mode}: gunicorn up on {base_url}")
+            yield base_url
+        finally:
+            process.terminate()
+            process.wait(timeout=30)
+
+    def load(self, mode, base_url, spec, bill_ids, cookies, headers, options):
+        local = threading.local()
+        method, path = _method_and_path(spec)
+
+        def url(index):
+            return base_url + path.format(bill=bill_ids[index % len(bill_ids)] if bill_ids else '')
+
+        def fetch(index):
+            if not hasattr(local, 'session'):
+                local.session = requests.Session()
+                local.session.cookies.update(cookies)
+                local.session.headers.update(headers)
+            started = time.perf_counter()
+            try:
+                response = local.session.request(method, url(index), allow_redirects=False, timeout=120)
+                failed = response.status_code >= 400
+            except requests.RequestException:
+                failed = True
+            return (time.perf_counter() - started) * 1000, failed
+
+        # one untimed request so the workers have loaded the app and warmed the cache
+        requests.request(method, url(0), cookies=cookies, headers=headers, allow_redirects=False, timeout=120)
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['concurrency']) as pool:
+            outcomes = list(pool.map(fetch, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        timings = sorted(timing for timing, _ in outcomes)
+        return {
+            'mode': mode,
+            'path': spec,
+            'rps': len(outcomes) / elapsed,
+            'p50': _percentile(timings, 0.5),
+            'p95': _percentile(timings, 0.95),
+            'p99': _percentile(timings, 0.99),
+            'errors': sum(failed for _, failed in outcomes),
+        }
@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from sales.gateway import get_gateway_client
+from sales.messaging import claim_messages, deliver_batch, requeue_stale_messages
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        body = get_gateway_client().render_metrics().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Drain the outbound WhatsApp message queue through the gateway."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--concurrency', type=int, default=settings.OUTBOX_CONCURRENCY,
+                            help="Number of gateway requests in flight at once.")
+        parser.add_argument('--batch-size', type=int, default=settings.OUTBOX_BATCH_SIZE,
+                            help="Messages claimed from the queue per round.")
+        parser.add_argument('--poll-interval', type=float, default=settings.OUTBOX_POLL_SECONDS,
+                            help="Seconds to sleep when the queue is empty.")
+        parser.add_argument('--once', action='store_true',
+                            help="Process whatever is due and exit instead of polling.")
+        parser.add_argument('--metrics-port', type=int,
+                            help="Serve gateway client metrics (Prometheus text format) on this port.")
+
+    def handle(self, *args, **options):
+        concurrency = max(options['concurrency'], 1)
+        sent = failed = unknown = 0
+
+        if options['metrics_port']:
+            server = ThreadingHTTPServer(('', options['metrics_port']), MetricsHandler)
+            threading.Thread(target=server.serve_forever, daemon=True).start()
+
+        with ThreadPoolExecutor(max_workers=concurrency) as pool:
+            while True:
+                requeue_stale_messages()
+                batch = claim_messages(options['batch_size'])
+
+                if batch:
+                    # spread the claimed messages over the pool, one gateway batch per chunk
+                    chunk_size = -(-len(batch) // concurrency)
+                    chunks = [batch[i:i + chunk_size] for i in range(0, len(batch), chunk_size)]
+                    for chunk, results in zip(chunks, pool.map(self._deliver, chunks)):
+                        for message, result in zip(chunk, results):
+                            if result.get('unknown'):
+                                unknown += 1
+                                self.stderr.write(
+                                    f"#{message.pk} to {message.recipient}: {result['error']} (not retried)"
+                                )
+                            elif 'error' in result:
+                                failed += 1
+                                self.stderr.write(f"#{message.pk} to {message.recipient}: {result['error']}")
+                            else:
+                                sent += 1
+                    continue
+
+                if options['once']:
+                    break
+                close_old_connections()
+                time.sleep(options['poll_interval'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Sent {sent} message(s), {failed} failed attempt(s), {unknown} with unknown delivery"
+        ))
+
+    def _deliver(self, messages):
+        try:
+            return deliver_batch(messages)
+        finally:
+            close_old_connections()
@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sales.models import Shop, ShopCollectionSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild every shop's collection summary for today's date (run nightly after midnight)."
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        shop_ids = Shop.objects.values_list('id', flat=True)
+
+        count = 0
+        for shop_id in shop_ids.iterator():
+            ShopCollectionSummary.rebuild(shop_id, today)
+            count += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Rebucketed {count} shop(s) as of {today}"))
@@ -0,0 +1,57 @@
+import csv
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sales.models import Shop
+from sales.reconciliation import RECEIPT_COLUMNS, REPORT_HEADER, reconcile_payments
+
+
+class Command(BaseCommand):
+    help = (
+        "Record a file of receipts against a shop's bills by bill number. The CSV has the columns "
+        + ", ".join(RECEIPT_COLUMNS) + "."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('shop_id', type=int)
+        parser.add_argument('csv_file')
+        parser.add_argument('--batch-size', type=int, default=1000, help="Receipts applied per transaction.")
+        parser.add_argument('--allow-overpayment', action='store_true',
+                            help="Record receipts larger than the pending amount (still reported).")
+        parser.add_argument('--dry-run', action='store_true', help="Match the file without saving anything.")
+        parser.add_argument('--report', help="Write unmatched, overpaid and invalid entries to this CSV file.")
+
+    def handle(self, *args, **options):
+        shop = Shop.objects.filter(id=options['shop_id']).first()
+        if shop is None:
+            raise CommandError(f"Shop {options['shop_id']} does not exist")
+
+        started = time.perf_counter()
+        try:
+            with open(options['csv_file'], newline='', encoding='utf-8-sig') as lines:
+                result = reconcile_payments(
+                    shop,
+                    lines,
+                    batch_size=options['batch_size'],
+                    allow_overpayment=options['allow_overpayment'],
+                    dry_run=options['dry_run'],
+                )
+        except OSError as e:
+            raise CommandError(str(e))
+
+        if options['report']:
+            with open(options['report'], 'w', newline='') as output:
+                writer = csv.writer(output)
+                writer.writerow(REPORT_HEADER)
+                writer.writerows(result.report)
+        else:
+            for line, bill_number, amount, status, message in result.report:
+                self.stdout.write(self.style.WARNING(f"Line {line} ({bill_number}, {amount}): {status} - {message}"))
+
+        prefix = "Dry run: would record" if options['dry_run'] else "Recorded"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {result.matched} of {result.rows} receipt(s), {result.amount_applied:.2f} in total, "
+            f"in {time.perf_counter() - started:.2f}s; {result.count('unmatched')} unmatched, "
+            f"{result.count('overpaid')} overpaid, {result.count('invalid')} invalid"
+        ))
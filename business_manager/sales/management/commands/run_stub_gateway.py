@@ -0,0 +1,87 @@
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class StubGatewayHandler(BaseHTTPRequestHandler):
+    # set by the command before the server starts
+    latency = 0.0
+    fail_rate = 0.0
+    counts = {'requests': 0, 'messages': 0, 'failed': 0}
+    lock = threading.Lock()
+
+    def do_POST(self):
+        try:
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        except ValueError:
+            return self._reply(400, {"error": "Invalid JSON"})
+
+        if self.path == '/send-message':
+            result = self._send(payload)
+            return self._reply(500 if 'error' in result else 200, result)
+
+        if self.path == '/send-messages':
+            messages = payload.get('messages')
+            if not isinstance(messages, list):
+                return self._reply(400, {"error": "messages must be an array"})
+            return self._reply(200, {"results": [self._send(m) for m in messages]})
+
+        self._reply(404, {"error": "Not found"})
+
+    def _send(self, message):
+        # same per-item check as server.js
+        if not isinstance(message, dict) or not message.get('number') or not message.get('message'):
+            return {"error": "Each message needs a number and a message"}
+        time.sleep(self.latency)
+        failed = random.random() < self.fail_rate
+        with self.lock:
+            self.counts['messages'] += 1
+            self.counts['failed'] += int(failed)
+        if failed:
+            return {"number": message.get('number'), "error": "Failed to send message"}
+        return {"number": message.get('number'), "status": "Message sent successfully"}
+
+    def _reply(self, status, body):
+        with self.lock:
+            self.counts['requests'] += 1
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class Command(BaseCommand):
+    help = "Run a stand-in for whatsapp-services/server.js that accepts sends without a WhatsApp session."
+
+    def add_arguments(self, parser):
+        parser.add_argument('--port', type=int, default=3000)
+        parser.add_argument('--latency', type=float, default=0.0,
+                            help="Seconds each simulated send takes.")
+        parser.add_argument('--fail-rate', type=float, default=0.0,
+                            help="Fraction of messages (0-1) that report a send failure.")
+
+    def handle(self, *args, **options):
+        StubGatewayHandler.latency = options['latency']
+        StubGatewayHandler.fail_rate = options['fail_rate']
+        server = ThreadingHTTPServer(('127.0.0.1', options['port']), StubGatewayHandler)
+        self.stdout.write(f"Stub WhatsApp gateway listening on http://127.0.0.1:{options['port']}")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            counts = StubGatewayHandler.counts
+            self.stdout.write(
+                f"{counts['requests']} request(s), {counts['messages']} message(s), {counts['failed']} failed"
+            )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from sales.reminders import plan_reminders, send_reminders
+
+
+class Command(BaseCommand):
+    help = (
+        "Queue one consolidated overdue reminder per client, and one follow-up alert per sales "
+        "person, for every overdue bill. Meant to run daily from a scheduler; clients reminded "
+        "and sales people alerted within their stage's cool-down (REMINDER_ESCALATION) are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--shop', type=int, action='append', dest='shops',
+                            help="Only this shop (repeatable). Default: every shop.")
+        parser.add_argument('--dry-run', action='store_true',
+                            help="Print the messages that would be queued without queueing them.")
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        if options['dry_run']:
+            campaign = plan_reminders(shop_ids=options['shops'])
+            for message in campaign.messages:
+                self.stdout.write(f"To {message.recipient}:\n{message.body}\n")
+        else:
+            campaign = send_reminders(shop_ids=options['shops'])
+
+        prefix = "Dry run: would queue" if options['dry_run'] else "Queued"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} {len(campaign.clients) - campaign.without_number} client reminder(s) "
+            f"covering {campaign.bill_count()} bill(s) "
+            f"and {len(campaign.sales_people)} sales person alert(s) in {time.perf_counter() - started:.2f}s; "
+            f"{campaign.cooling_down} client(s) and {campaign.sales_people_cooling_down} sales person(s) "
+            f"still in their cool-down; {campaign.without_number} client(s) have no phone number"
+        ))
@@ -0,0 +1,190 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db.models import F, Max
+from django.utils import timezone
+
+from .gateway import get_async_gateway_client, get_gateway_client
+from .models import OutboundMessage
+from .search import COUNTRY_CODE, normalize_phone
+
+
+def whatsapp_number(phone):
+    # None for a phone without digits, which cannot be sent to
+    digits = normalize_phone(phone)
+    return f"{COUNTRY_CODE}{digits}" if digits else None
+
+
+def send_whatsapp_message(number, message):
+    return get_gateway_client().send_message(number, message)
+
+
+def enqueue_whatsapp_message(phone, message, bill=None):
+    # returns None, queueing nothing, when the phone has no number to send to
+    recipient = whatsapp_number(phone)
+    if recipient is None:
+        return None
+    return OutboundMessage.objects.create(
+        shop=bill.shop if bill else None,
+        bill=bill,
+        recipient=recipient,
+        body=message,
+    )
+
+
+async def aenqueue_whatsapp_message(phone, message, bill=None):
+    recipient = whatsapp_number(phone)
+    if recipient is None:
+        return None
+    return await OutboundMessage.objects.acreate(
+        shop_id=bill.shop_id if bill else None,
+        bill=bill,
+        recipient=recipient,
+        body=message,
+    )
+
+
+def requeue_stale_messages():
+    # messages left in "sending" by a worker that died mid-batch
+    lease_expired = timezone.now() - timedelta(seconds=settings.OUTBOX_LEASE_SECONDS)
+    return OutboundMessage.objects.filter(
+        status='sending',
+        claimed_at__lt=lease_expired
+    ).update(status='queued', claim_token='', claimed_at=None)
+
+
+def claim_messages(limit):
+    now = timezone.now()
+    due_ids = list(
+        OutboundMessage.objects
+        .filter(status='queued', next_attempt_at__lte=now)
+        .order_by('next_attempt_at', 'id')
+        .values_list('id', flat=True)[:limit]
+    )
+    return _claim(due_ids, now)
+
+
+def claim_messages_by_id(message_ids):
+    return _claim(message_ids, timezone.now())
+
+
+def _claim(due_ids, now):
+    if not due_ids:
+        return []
+
+    # the status filter makes the claim safe against other workers
+    token = uuid.uuid4().hex
+    OutboundMessage.objects.filter(id__in=due_ids, status='queued').update(
+        status='sending',
+        claim_token=token,
+        claimed_at=now,
+        attempts=F('attempts') + 1,
+    )
+    claimed = list(
+        OutboundMessage.objects
+        .filter(claim_token=token, status='sending')
+        .order_by('next_attempt_at', 'id')
+    )
+    return _apply_recipient_rate_limit(claimed, now)
+
+
+def _apply_recipient_rate_limit(messages, now):
+    interval = timedelta(seconds=settings.OUTBOX_RECIPIENT_INTERVAL_SECONDS)
+    last_sent = dict(
+        OutboundMessage.objects
+        .filter(recipient__in={m.recipient for m in messages}, status='sent')
+        .values('recipient')
+        .annotate(last=Max('sent_at'))
+        .values_list('recipient', 'last')
+    )
+
+    ready = []
+    for message in messages:
+        last = last_sent.get(message.recipient)
+        if last and last + interval > now:
+            _release(message, last + interval)
+            continue
+        # later messages to the same recipient in this batch wait their turn
+        last_sent[message.recipient] = now
+        ready.append(message)
+    return ready
+
+
+def _release(message, next_attempt_at):
+    OutboundMessage.objects.filter(pk=message.pk).update(
+        status='queued',
+        claim_token='',
+        claimed_at=None,
+        attempts=F('attempts') - 1,
+        next_attempt_at=next_attempt_at,
+    )
+
+
+def retry_delay(attempts):
+    delay = settings.OUTBOX_BACKOFF_SECONDS * (2 ** max(attempts - 1, 0))
+    return timedelta(seconds=min(delay, settings.OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+def deliver(message):
+    result = send_whatsapp_message(message.recipient, message.body)
+    record_result(message, result)
+    return result
+
+
+def deliver_batch(messages):
+    client = get_gateway_client()
+    if client.batch_size <= 1:
+        return [deliver(message) for message in messages]
+
+    results = client.send_batch([(message.recipient, message.body) for message in messages])
+    for message, result in zip(messages, results):
+        record_result(message, result)
+    return results
+
+
+async def adeliver_now(messages):
+    """Send just-queued messages from an async view without holding a thread.
+
+    The messages are claimed like the outbox worker claims them, so neither
+    sends them twice; anything that fails stays queued for the worker.
+    """
+    claimed = await sync_to_async(claim_messages_by_id)([message.pk for message in messages])
+    client = get_async_gateway_client()
+    results = await asyncio.gather(*(
+        client.send_message(message.recipient, message.body) for message in claimed
+    ))
+    for message, result in zip(claimed, results):
+        await sync_to_async(record_result)(message, result)
+    return results
+
+
+def record_result(message, result):
+    if result.get('circuit_open'):
+        # the gateway was never called, so this does not count as an attempt
+        _release(message, timezone.now() + timedelta(seconds=result['retry_after']))
+        return
+
+    if result.get('unknown'):
+        # the gateway may have sent it, so a retry could send it twice
+        message.status = 'unknown'
+        message.last_error = str(result['error'])
+    elif 'error' not in result:
+        message.status = 'sent'
+        message.sent_at = timezone.now()
+        message.last_error = ''
+    elif message.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        message.status = 'failed'
+        message.last_error = str(result['error'])
+    else:
+        message.status = 'queued'
+        message.next_attempt_at = timezone.now() + retry_delay(message.attempts)
+        message.last_error = str(result['error'])
+
+    message.claim_token = ''
+    message.claimed_at = None
+    message.save(update_fields=[
+        'status', 'sent_at', 'last_error', 'next_attempt_at', 'claim_token', 'claimed_at'
+    ])
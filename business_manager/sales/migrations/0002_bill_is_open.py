@@ -0,0 +1,26 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bill',
+            name='is_open',
+            field=models.BooleanField(default=True, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['shop', 'is_open', 'due_date'], name='bill_shop_open_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['is_open', 'due_date'], name='bill_open_due_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+def backfill_is_open(apps, schema_editor):
+    Bill = apps.get_model('sales', 'Bill')
+    Bill.objects.filter(paid_amount__lt=models.F('total_amount')).update(is_open=True)
+    Bill.objects.filter(paid_amount__gte=models.F('total_amount')).update(is_open=False)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0002_bill_is_open'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_is_open, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0003_backfill_bill_is_open'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShopCollectionSummary',
+            fields=[
+                ('shop', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='collection_summary', serialize=False, to='sales.shop')),
+                ('as_of', models.DateField()),
+                ('pending_total', models.FloatField(default=0)),
+                ('overdue_total', models.FloatField(default=0)),
+                ('today_total', models.FloatField(default=0)),
+                ('upcoming_total', models.FloatField(default=0)),
+                ('overdue_count', models.IntegerField(default=0)),
+                ('today_count', models.IntegerField(default=0)),
+                ('upcoming_count', models.IntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
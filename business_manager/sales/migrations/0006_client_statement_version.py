@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0005_outboundmessage'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='client',
+            name='statement_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
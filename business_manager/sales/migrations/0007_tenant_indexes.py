@@ -0,0 +1,31 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:34
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0006_client_statement_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['shop', 'client', 'bill_date'], name='bill_shop_client_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['shop', 'bill_date'], name='bill_shop_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['shop', 'name'], name='client_shop_name_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='payment',
+            index=models.Index(fields=['shop', 'payment_date'], name='payment_shop_date_idx'),
+        ),
+    ]
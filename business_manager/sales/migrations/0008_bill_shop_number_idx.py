@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:41
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0007_tenant_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='bill',
+            index=models.Index(fields=['shop', 'bill_number'], name='bill_shop_number_idx'),
+        ),
+    ]
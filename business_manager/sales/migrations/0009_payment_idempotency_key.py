@@ -0,0 +1,22 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:44
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0008_bill_shop_number_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='payment',
+            name='idempotency_key',
+            field=models.CharField(blank=True, editable=False, max_length=64, null=True),
+        ),
+        migrations.AddConstraint(
+            model_name='payment',
+            constraint=models.UniqueConstraint(fields=('shop', 'idempotency_key'), name='payment_shop_idempotency_key_uniq'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0009_payment_idempotency_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='shop',
+            name='data_changed_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='shop',
+            name='data_version',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
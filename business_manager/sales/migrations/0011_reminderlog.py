@@ -0,0 +1,34 @@
+# Generated by Django 5.2.10 on 2026-10-18 07:57
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0010_shop_data_version'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReminderLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('stage', models.CharField(max_length=20)),
+                ('bill_count', models.PositiveIntegerField(default=0)),
+                ('pending_amount', models.FloatField(default=0)),
+                ('reminded_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('client', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='sales.client')),
+                ('message', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='sales.outboundmessage')),
+                ('sales_person', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.shop')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['reminded_at'], name='reminder_time_idx'), models.Index(fields=['client', 'reminded_at'], name='reminder_client_idx')],
+            },
+        ),
+    ]
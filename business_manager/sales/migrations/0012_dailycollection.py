@@ -0,0 +1,31 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:05
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0011_reminderlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyCollection',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('payment_mode', models.CharField(choices=[('cash', 'Cash'), ('cheque', 'Cheque')], max_length=15)),
+                ('amount', models.FloatField(default=0)),
+                ('count', models.IntegerField(default=0)),
+                ('sales_person', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL)),
+                ('shop', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='sales.shop')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('shop', 'date', 'payment_mode', 'sales_person'), name='daily_collection_uniq')],
+            },
+        ),
+    ]
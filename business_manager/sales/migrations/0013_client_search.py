@@ -0,0 +1,53 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:09
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0012_dailycollection'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ClientSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=30)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='phone_digits',
+            field=models.CharField(blank=True, editable=False, max_length=15),
+        ),
+        migrations.AddField(
+            model_name='client',
+            name='phone_reversed',
+            field=models.CharField(blank=True, editable=False, max_length=15),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['shop', 'phone_digits'], name='client_shop_phone_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddIndex(
+            model_name='client',
+            index=models.Index(fields=['shop', 'phone_reversed'], name='client_shop_phone_rev_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+        migrations.AddField(
+            model_name='clientsearchtoken',
+            name='client',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='sales.client'),
+        ),
+        migrations.AddField(
+            model_name='clientsearchtoken',
+            name='shop',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to='sales.shop'),
+        ),
+        migrations.AddIndex(
+            model_name='clientsearchtoken',
+            index=models.Index(fields=['shop', 'token'], name='client_token_shop_idx', opclasses=['int8_ops', 'varchar_pattern_ops']),
+        ),
+    ]
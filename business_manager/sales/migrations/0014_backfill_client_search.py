@@ -0,0 +1,75 @@
+import re
+import unicodedata
+
+from django.db import migrations
+
+
+BATCH_SIZE = 2000
+TOKEN_LENGTH = 30
+MAX_TOKENS = 10
+COUNTRY_CODE = '91'
+NATIONAL_DIGITS = 10
+
+
+# frozen copies of sales.search as of this migration, so later changes to
+# the app code do not change what it writes
+
+def normalize_phone(phone):
+    digits = re.sub(r'\D', '', phone or '').lstrip('0')
+    if len(digits) == NATIONAL_DIGITS + len(COUNTRY_CODE) and digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    return digits
+
+
+def name_tokens(name):
+    chars = []
+    base = ''
+    for char in unicodedata.normalize('NFKD', name or '').casefold():
+        if unicodedata.category(char).startswith('M'):
+            if base >= '\u0250':
+                chars.append(char)
+        elif char.isalnum():
+            base = char
+            chars.append(char)
+        else:
+            base = ''
+            chars.append(' ')
+    words = unicodedata.normalize('NFC', ''.join(chars)).split()
+    return list(dict.fromkeys(word[:TOKEN_LENGTH] for word in words))[:MAX_TOKENS]
+
+
+def backfill_client_search(apps, schema_editor):
+    Client = apps.get_model('sales', 'Client')
+    ClientSearchToken = apps.get_model('sales', 'ClientSearchToken')
+    ClientSearchToken.objects.all().delete()
+
+    # keyset batches: SQLite gives no isolation between an open cursor and writes to its table
+    last_id = 0
+    while True:
+        clients = list(
+            Client.objects.filter(id__gt=last_id).order_by('id')
+            .only('id', 'shop_id', 'name', 'phone')[:BATCH_SIZE]
+        )
+        if not clients:
+            break
+        for client in clients:
+            client.phone_digits = normalize_phone(client.phone)
+            client.phone_reversed = client.phone_digits[::-1]
+        Client.objects.bulk_update(clients, ['phone_digits', 'phone_reversed'])
+        ClientSearchToken.objects.bulk_create([
+            ClientSearchToken(shop_id=client.shop_id, client_id=client.id, token=token)
+            for client in clients
+            for token in name_tokens(client.name)
+        ])
+        last_id = clients[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0013_client_search'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_client_search, migrations.RunPython.noop),
+    ]
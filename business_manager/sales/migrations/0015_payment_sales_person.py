@@ -0,0 +1,60 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:19
+
+import django.db.models.deletion
+import django.db.models.functions.comparison
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, Min, OuterRef, Subquery, Sum
+
+
+def snapshot_sales_person(apps, schema_editor):
+    # the best record there is of who a past payment was counted for
+    Payment = apps.get_model('sales', 'Payment')
+    Bill = apps.get_model('sales', 'Bill')
+    Payment.objects.update(
+        sales_person_id=Subquery(Bill.objects.filter(id=OuterRef('bill_id')).values('sales_person_id'))
+    )
+
+
+def merge_unattributed_rows(apps, schema_editor):
+    # the old constraint let concurrent creates duplicate rows without a sales person
+    DailyCollection = apps.get_model('sales', 'DailyCollection')
+    duplicates = (
+        DailyCollection.objects.filter(sales_person__isnull=True)
+        .values('shop_id', 'date', 'payment_mode')
+        .annotate(rows=Count('id'), keep=Min('id'), amount=Sum('amount'), count=Sum('count'))
+        .filter(rows__gt=1)
+    )
+    for group in list(duplicates):
+        rows = DailyCollection.objects.filter(
+            sales_person__isnull=True, shop_id=group['shop_id'], date=group['date'],
+            payment_mode=group['payment_mode'],
+        )
+        rows.exclude(id=group['keep']).delete()
+        rows.filter(id=group['keep']).update(amount=group['amount'], count=group['count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0014_backfill_client_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='dailycollection',
+            name='daily_collection_uniq',
+        ),
+        migrations.AddField(
+            model_name='payment',
+            name='sales_person',
+            field=models.ForeignKey(blank=True, editable=False, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.RunPython(snapshot_sales_person, migrations.RunPython.noop),
+        migrations.RunPython(merge_unattributed_rows, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='dailycollection',
+            constraint=models.UniqueConstraint(models.F('shop'), models.F('date'), models.F('payment_mode'), django.db.models.functions.comparison.Coalesce('sales_person', models.Value(0), output_field=models.BigIntegerField()), name='daily_collection_uniq'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0015_payment_sales_person'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='payment',
+            name='payment_date',
+            field=models.DateField(default=django.utils.timezone.localdate, editable=False),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:23
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0016_payment_date_default'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='reminderlog',
+            index=models.Index(fields=['sales_person', 'reminded_at'], name='reminder_sales_person_idx'),
+        ),
+    ]
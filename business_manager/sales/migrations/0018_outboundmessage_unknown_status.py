@@ -0,0 +1,18 @@
+# Generated by Django 5.2.10 on 2026-10-18 08:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sales', '0017_reminder_sales_person_idx'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='outboundmessage',
+            name='status',
+            field=models.CharField(choices=[('queued', 'Queued'), ('sending', 'Sending'), ('sent', 'Sent'), ('failed', 'Failed'), ('unknown', 'Unknown')], default='queued', max_length=10),
+        ),
+    ]
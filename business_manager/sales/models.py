@@ -1,12 +1,115 @@
-from django.db import models
+import re
+
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
-from django.db.models import Sum
+from django.db.models import Case, Sum, Count, Exists, F, OuterRef, Q, Value, When
+from django.db.models.functions import Coalesce
 from django.contrib.auth.models import User
 
+from .search import COUNTRY_CODE, name_tokens, normalize_phone, prefix_filter
+
+class ShopQuerySet(models.QuerySet):
+    def for_user(self, user):
+        return self.filter(owner=user)
+
+
+class TenantQuerySet(models.QuerySet):
+    """Rows belonging to one shop, or to the shops a user owns."""
+
+    def for_shop(self, shop):
+        return self.filter(shop=shop)
+
+    def for_user(self, user):
+        return self.filter(shop__owner=user)
+
+
+BILL_STATUS_CHOICES = [
+    ('paid', 'Paid'),
+    ('overdue', 'Overdue'),
+    ('partial', 'Partial'),
+    ('pending', 'Pending'),
+]
+
+
+def bill_status_filters(today):
+    # mutually exclusive, so each status can be filtered on with the indexed columns
+    return {
+        'paid': Q(is_open=False),
+        'overdue': Q(is_open=True, due_date__lt=today),
+        'partial': Q(is_open=True, due_date__gte=today, paid_amount__gt=0),
+        'pending': Q(is_open=True, due_date__gte=today, paid_amount__lte=0),
+    }
+
+
+class BillQuerySet(TenantQuerySet):
+    def with_status(self, today=None):
+        # `pending` and `status_code` computed by the database, for sorting and filtering
+        filters = bill_status_filters(today or timezone.localdate())
+        return self.annotate(
+            pending=F('total_amount') - F('paid_amount'),
+            status_code=Case(
+                *[When(condition, then=Value(code)) for code, condition in filters.items()],
+                output_field=models.CharField(),
+            ),
+        )
+
+    def with_status_code(self, code, today=None):
+        return self.filter(bill_status_filters(today or timezone.localdate())[code])
+
+
+class ClientQuerySet(TenantQuerySet):
+    def search(self, query, shop_ids):
+        """Clients of `shop_ids` whose phone starts or ends with the digits
+        of `query`, or with a name word starting with each word of it."""
+        shop_ids = list(shop_ids)
+        clients = self.filter(shop_id__in=shop_ids)
+
+        if re.fullmatch(r'[\d\s()+\-]+', query) and re.search(r'\d', query):
+            digits = re.sub(r'\D', '', query)
+            if query.strip().startswith('+'):
+                digits = digits.removeprefix(COUNTRY_CODE)
+            return clients.filter(
+                prefix_filter('phone_digits', normalize_phone(digits) or digits)
+                | prefix_filter('phone_reversed', digits[::-1])
+            )
+
+        tokens = name_tokens(query)
+        if not tokens:
+            return clients.none()
+        # driven by the (shop, token) index for the longest word, so a LIMIT
+        # can stop early; the other words are checked per client
+        tokens.sort(key=len, reverse=True)
+        clients = clients.filter(
+            prefix_filter('search_tokens__token', tokens[0]),
+            search_tokens__shop_id__in=shop_ids,
+        )
+        for token in tokens[1:]:
+            clients = clients.filter(Exists(ClientSearchToken.objects.filter(
+                prefix_filter('token', token), client=OuterRef('pk'),
+            )))
+        # one name can have two words starting with the same letters
+        return clients.distinct()
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create skips save(), so fill in the search keys here
+        objs = list(objs)
+        for client in objs:
+            client.set_search_keys()
+        created = super().bulk_create(objs, *args, **kwargs)
+        ClientSearchToken.index(created, replace=False)
+        return created
+
+
 class Shop(models.Model):
     name = models.CharField(max_length=200)
     owner = models.ForeignKey(User, on_delete=models.CASCADE, related_name="shops")
     created_at = models.DateTimeField(auto_now_add=True)
+    # bumped whenever one of the shop's clients, bills or payments changes;
+    # the JSON API derives its ETag and Last-Modified headers from these
+    data_version = models.PositiveIntegerField(default=0, editable=False)
+    data_changed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
+    objects = ShopQuerySet.as_manager()
 
     def __str__(self):
         return self.name
@@ -24,10 +127,87 @@ class Client(models.Model):
     name = models.CharField(max_length=100)
     phone = models.CharField(max_length=15)
     address = models.TextField(blank=True)
+    # bumped whenever one of the client's bills or payments changes
+    statement_version = models.PositiveIntegerField(default=0, editable=False)
+    # search keys derived from `phone` on save: the normalized digits, and the
+    # same reversed so "ends with" searches are prefix searches too
+    phone_digits = models.CharField(max_length=15, blank=True, editable=False)
+    phone_reversed = models.CharField(max_length=15, blank=True, editable=False)
+
+    objects = ClientQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['shop', 'name'], name='client_shop_name_idx'),
+            models.Index(
+                fields=['shop', 'phone_digits'], name='client_shop_phone_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+            models.Index(
+                fields=['shop', 'phone_reversed'], name='client_shop_phone_rev_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields() & {'shop_id', 'name'}:
+            instance._indexed_name = (instance.shop_id, instance.name)
+        return instance
+
+    def set_search_keys(self):
+        # a phone without digits gets no search keys, so searches never match it
+        self.phone_digits = normalize_phone(self.phone) or ''
+        self.phone_reversed = self.phone_digits[::-1]
+
+    def save(self, *args, **kwargs):
+        self.set_search_keys()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone' in update_fields:
+            kwargs['update_fields'] = {*update_fields, 'phone_digits', 'phone_reversed'}
+
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+            if getattr(self, '_indexed_name', None) != (self.shop_id, self.name):
+                ClientSearchToken.index([self])
+        self._indexed_name = (self.shop_id, self.name)
 
     def __str__(self):
         return self.name
-    
+
+
+class ClientSearchToken(models.Model):
+    """One word of a client's name, for ClientQuerySet.search()."""
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, null=True, blank=True)
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=30)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=['shop', 'token'], name='client_token_shop_idx',
+                opclasses=['int8_ops', 'varchar_pattern_ops'],
+            ),
+        ]
+
+    def __str__(self):
+        return self.token
+
+    @classmethod
+    def index(cls, clients, replace=True):
+        if replace:
+            cls.objects.filter(client__in=[client.pk for client in clients]).delete()
+        cls.objects.bulk_create([
+            cls(shop_id=client.shop_id, client_id=client.pk, token=token)
+            for client in clients
+            for token in name_tokens(client.name)
+        ])
+
+
+COLLECTION_STATE_FIELDS = {'shop_id', 'due_date', 'total_amount', 'paid_amount', 'is_open'}
+
 
 class Bill(models.Model):
     shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
@@ -44,7 +224,52 @@ class Bill(models.Model):
     due_date = models.DateField()
     total_amount = models.FloatField()
     paid_amount = models.FloatField(default=0)
-    
+    is_open = models.BooleanField(default=True, editable=False)
+
+    objects = BillQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['shop', 'is_open', 'due_date'], name='bill_shop_open_due_idx'),
+            models.Index(fields=['is_open', 'due_date'], name='bill_open_due_idx'),
+            models.Index(fields=['shop', 'client', 'bill_date'], name='bill_shop_client_date_idx'),
+            models.Index(fields=['shop', 'bill_date'], name='bill_shop_date_idx'),
+            models.Index(fields=['shop', 'bill_number'], name='bill_shop_number_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_client_id = instance.__dict__.get('client_id')
+        if not instance.get_deferred_fields() & COLLECTION_STATE_FIELDS:
+            instance._collection_state = instance.collection_state()
+        return instance
+
+    def collection_state(self):
+        # what this bill contributes to its shop's collection summary
+        if not self.is_open:
+            return None
+        return (self.shop_id, self.due_date, self.pending_amount())
+
+    def save(self, *args, **kwargs):
+        # keep the open/closed flag in step with the amounts
+        self.is_open = self.pending_amount() > 0
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'is_open' not in update_fields:
+            kwargs['update_fields'] = list(update_fields) + ['is_open']
+
+        with transaction.atomic():
+            old_state = getattr(self, '_collection_state', None)
+            if self.pk and not hasattr(self, '_collection_state'):
+                stored = Bill.objects.filter(pk=self.pk).first()
+                old_state = stored.collection_state() if stored else None
+
+            super().save(*args, **kwargs)
+
+            new_state = self.collection_state()
+            ShopCollectionSummary.apply_change(old_state, new_state)
+        self._collection_state = new_state
+        self._loaded_client_id = self.client_id
 
     def pending_amount(self):
         return (self.total_amount or 0) - (self.paid_amount or 0)
@@ -56,29 +281,46 @@ class Bill(models.Model):
         return 0
 
     def status(self):
-        today = timezone.localdate()
-        pending = self.pending_amount()
-
-        if pending <= 0:
-            return "Paid"
-        elif self.due_date < today:
-            return "Overdue"
-        elif self.paid_amount > 0:
-            return "Partial"
-        else:
-            return "Pending"
+        # uses the status_code annotation from Bill.objects.with_status() when present
+        code = getattr(self, 'status_code', None)
+        if code is None:
+            today = timezone.localdate()
+            if not self.is_open:
+                code = 'paid'
+            elif self.due_date < today:
+                code = 'overdue'
+            elif self.paid_amount > 0:
+                code = 'partial'
+            else:
+                code = 'pending'
+        return dict(BILL_STATUS_CHOICES)[code]
         
+    def apply_payment(self, amount):
+        # add to paid_amount in SQL, so concurrent payments can't overwrite each other
+        with transaction.atomic():
+            Bill.objects.filter(pk=self.pk).update(paid_amount=F('paid_amount') + amount)
+            self.paid_amount = Bill.objects.filter(pk=self.pk).values_list('paid_amount', flat=True).get()
+            # the state before this payment, which the summary delta starts from
+            previous_pending = self.pending_amount() + amount
+            self._collection_state = (
+                (self.shop_id, self.due_date, previous_pending) if previous_pending > 0 else None
+            )
+            self.save(update_fields=['paid_amount', 'is_open'])
+
     def update_paid_amount(self):
         total_paid = self.payments.aggregate(
             total=Sum('amount')
         )['total'] or 0
         self.paid_amount = total_paid
-        self.save(update_fields=['paid_amount'])
+        self.save(update_fields=['paid_amount', 'is_open'])
 
     def __str__(self):
         return f"{self.bill_number} - {self.client.name}"
 
 
+ROLLUP_STATE_FIELDS = {'shop_id', 'payment_date', 'payment_mode', 'sales_person_id', 'amount'}
+
+
 class Payment(models.Model):
     PAYMENT_CHOICES = [
         ('cash', 'Cash'),
@@ -89,8 +331,321 @@ class Payment(models.Model):
     amount = models.FloatField()
     payment_mode = models.CharField(max_length=15, choices=PAYMENT_CHOICES)
     cheque_number = models.CharField(max_length=50, blank=True, null=True)
-    payment_date = models.DateField(auto_now_add=True)
+    # today unless given, e.g. for the opening payments of imported bills
+    payment_date = models.DateField(default=timezone.localdate, editable=False)
+    # client-supplied key that makes retried submissions record the payment once
+    idempotency_key = models.CharField(max_length=64, null=True, blank=True, editable=False)
+    # the bill's sales person when the payment was recorded; the payment stays
+    # counted for them in DailyCollection if the bill is reassigned later
+    sales_person = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, editable=False, related_name='+'
+    )
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['shop', 'payment_date'], name='payment_shop_date_idx'),
+        ]
+        constraints = [
+            models.UniqueConstraint(fields=['shop', 'idempotency_key'], name='payment_shop_idempotency_key_uniq'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        if not instance.get_deferred_fields() & ROLLUP_STATE_FIELDS:
+            instance._rollup_state = instance.rollup_state()
+        return instance
+
+    def rollup_state(self):
+        # what this payment contributes to the DailyCollection rollup
+        return (self.shop_id, self.payment_date, self.payment_mode, self.sales_person_id, self.amount)
+
+    def save(self, *args, **kwargs):
+        if self._state.adding and self.sales_person_id is None:
+            self.sales_person_id = self.bill.sales_person_id
+        with transaction.atomic():
+            old_state = getattr(self, '_rollup_state', None)
+            if self.pk and not hasattr(self, '_rollup_state'):
+                stored = Payment.objects.filter(pk=self.pk).first()
+                old_state = stored.rollup_state() if stored else None
+
+            super().save(*args, **kwargs)
+
+            new_state = self.rollup_state()
+            DailyCollection.apply_change(old_state, new_state)
+        self._rollup_state = new_state
 
     def __str__(self):
         return f"{self.bill.bill_number} - {self.amount} ({self.payment_mode})"
-    
+
+
+class ShopCollectionSummary(models.Model):
+    BUCKETS = ('overdue', 'today', 'upcoming')
+
+    shop = models.OneToOneField(
+        Shop,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='collection_summary'
+    )
+    as_of = models.DateField()
+    pending_total = models.FloatField(default=0)
+    overdue_total = models.FloatField(default=0)
+    today_total = models.FloatField(default=0)
+    upcoming_total = models.FloatField(default=0)
+    overdue_count = models.IntegerField(default=0)
+    today_count = models.IntegerField(default=0)
+    upcoming_count = models.IntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.shop} - {self.as_of}"
+
+    @staticmethod
+    def bucket_for(due_date, today):
+        if due_date < today:
+            return 'overdue'
+        if due_date == today:
+            return 'today'
+        return 'upcoming'
+
+    @classmethod
+    def compute(cls, shop_id, today=None):
+        today = today or timezone.localdate()
+        pending = F('total_amount') - F('paid_amount')
+        bucket_filters = {
+            'overdue': Q(due_date__lt=today),
+            'today': Q(due_date=today),
+            'upcoming': Q(due_date__gt=today),
+        }
+
+        aggregates = {'pending_total': Coalesce(Sum(pending), 0.0)}
+        for bucket, bucket_filter in bucket_filters.items():
+            aggregates[f'{bucket}_total'] = Coalesce(Sum(pending, filter=bucket_filter), 0.0)
+            aggregates[f'{bucket}_count'] = Count('id', filter=bucket_filter)
+
+        return Bill.objects.filter(shop_id=shop_id, is_open=True).aggregate(**aggregates)
+
+    @classmethod
+    def rebuild(cls, shop_id, today=None, create=True):
+        today = today or timezone.localdate()
+        values = cls.compute(shop_id, today)
+        if create:
+            summary, _ = cls.objects.update_or_create(
+                shop_id=shop_id,
+                defaults={'as_of': today, **values}
+            )
+            return summary
+        cls.objects.filter(shop_id=shop_id).update(as_of=today, **values)
+        return None
+
+    @classmethod
+    def apply_change(cls, old_state, new_state, create=True):
+        # move a bill's contribution from old_state to new_state with F() updates,
+        # falling back to a rebuild when the row is missing or from an earlier day
+        today = timezone.localdate()
+        deltas = {}
+
+        for state, sign in ((old_state, -1), (new_state, 1)):
+            if state is None:
+                continue
+            shop_id, due_date, pending = state
+            bucket = cls.bucket_for(due_date, today)
+            delta = deltas.setdefault(shop_id, {})
+            delta['pending_total'] = delta.get('pending_total', 0) + sign * pending
+            delta[f'{bucket}_total'] = delta.get(f'{bucket}_total', 0) + sign * pending
+            delta[f'{bucket}_count'] = delta.get(f'{bucket}_count', 0) + sign
+
+        for shop_id, delta in deltas.items():
+            delta = {field: value for field, value in delta.items() if value}
+            if not delta:
+                continue
+            updated = cls.objects.filter(shop_id=shop_id, as_of=today).update(
+                **{field: F(field) + value for field, value in delta.items()}
+            )
+            if not updated:
+                cls.rebuild(shop_id, today, create=create)
+
+    @classmethod
+    def current(cls, shop_ids):
+        # fresh summaries for the given shops, rebuilding any that are missing or stale
+        today = timezone.localdate()
+        summaries = {s.shop_id: s for s in cls.objects.filter(shop_id__in=shop_ids)}
+        for shop_id in shop_ids:
+            summary = summaries.get(shop_id)
+            if summary is None or summary.as_of != today:
+                summaries[shop_id] = cls.rebuild(shop_id, today)
+        return [summaries[shop_id] for shop_id in shop_ids]
+
+
+class DailyCollection(models.Model):
+    """Payments summed per shop, day, payment mode and sales person.
+
+    Payment.save() and the payment delete signal keep it current with F()
+    updates; bulk paths call record_payments() and `manage.py
+    backfill_daily_collections` rebuilds it from the payments. A payment
+    counts for Payment.sales_person, its bill's sales person when it was
+    recorded.
+    """
+
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
+    date = models.DateField()
+    payment_mode = models.CharField(max_length=15, choices=Payment.PAYMENT_CHOICES)
+    sales_person = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    amount = models.FloatField(default=0)
+    count = models.IntegerField(default=0)
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        constraints = [
+            # NULLs are distinct in a plain unique constraint, so rows without a
+            # sales person are keyed on 0 to make concurrent creates collide
+            models.UniqueConstraint(
+                'shop', 'date', 'payment_mode',
+                Coalesce('sales_person', Value(0), output_field=models.BigIntegerField()),
+                name='daily_collection_uniq',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.payment_mode}: {self.amount}"
+
+    @classmethod
+    def add(cls, shop_id, date, payment_mode, sales_person_id, amount, count, create=True):
+        key = {
+            'shop_id': shop_id,
+            'date': date,
+            'payment_mode': payment_mode,
+            'sales_person_id': sales_person_id,
+        }
+        changes = {'amount': F('amount') + amount, 'count': F('count') + count}
+        if cls.objects.filter(**key).update(**changes) or not create:
+            return
+        try:
+            with transaction.atomic():
+                cls.objects.create(**key, amount=amount, count=count)
+        except IntegrityError:
+            # a concurrent payment created the row first
+            cls.objects.filter(**key).update(**changes)
+
+    @classmethod
+    def apply_change(cls, old_state, new_state, create=True):
+        # move a payment's contribution from old_state to new_state
+        deltas = {}
+        for state, sign in ((old_state, -1), (new_state, 1)):
+            if state is None:
+                continue
+            *key, amount = state
+            key = tuple(key)
+            total, count = deltas.get(key, (0, 0))
+            deltas[key] = (total + sign * amount, count + sign)
+
+        for key, (amount, count) in deltas.items():
+            if amount or count:
+                cls.add(*key, amount, count, create=create)
+
+    @classmethod
+    def record_payments(cls, payments):
+        # for bulk_create paths, which skip Payment.save() and so must set sales_person themselves
+        totals = {}
+        for payment in payments:
+            key = (payment.shop_id, payment.payment_date, payment.payment_mode, payment.sales_person_id)
+            amount, count = totals.get(key, (0, 0))
+            totals[key] = (amount + payment.amount, count + 1)
+        for key, (amount, count) in totals.items():
+            cls.add(*key, amount, count)
+
+    @classmethod
+    def rebuild(cls, shop_id, from_date=None, to_date=None):
+        payments = Payment.objects.filter(shop_id=shop_id)
+        rows = cls.objects.filter(shop_id=shop_id)
+        if from_date:
+            payments = payments.filter(payment_date__gte=from_date)
+            rows = rows.filter(date__gte=from_date)
+        if to_date:
+            payments = payments.filter(payment_date__lte=to_date)
+            rows = rows.filter(date__lte=to_date)
+
+        with transaction.atomic():
+            rows.delete()
+            return cls.objects.bulk_create(
+                cls(
+                    shop_id=shop_id,
+                    date=row['payment_date'],
+                    payment_mode=row['payment_mode'],
+                    sales_person_id=row['sales_person_id'],
+                    amount=row['amount'],
+                    count=row['count'],
+                )
+                for row in payments
+                .values('payment_date', 'payment_mode', 'sales_person_id')
+                .annotate(amount=Sum('amount'), count=Count('id'))
+                .order_by()
+            )
+
+
+class OutboundMessage(models.Model):
+    STATUS_CHOICES = [
+        ('queued', 'Queued'),
+        ('sending', 'Sending'),
+        ('sent', 'Sent'),
+        ('failed', 'Failed'),
+        # sent to the gateway but no reply came back; not retried automatically
+        ('unknown', 'Unknown'),
+    ]
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE, null=True, blank=True)
+    bill = models.ForeignKey(
+        Bill,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='messages'
+    )
+    recipient = models.CharField(max_length=20)
+    body = models.TextField()
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='queued')
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    claim_token = models.CharField(max_length=32, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'next_attempt_at'], name='outbox_status_next_idx'),
+            models.Index(fields=['recipient', 'sent_at'], name='outbox_recipient_sent_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient} - {self.status}"
+
+
+class ReminderLog(models.Model):
+    # one row per consolidated reminder, used to enforce the cool-down
+    shop = models.ForeignKey(Shop, on_delete=models.CASCADE)
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, null=True, blank=True)
+    sales_person = models.ForeignKey(User, on_delete=models.CASCADE, null=True, blank=True)
+    stage = models.CharField(max_length=20)
+    bill_count = models.PositiveIntegerField(default=0)
+    pending_amount = models.FloatField(default=0)
+    message = models.ForeignKey(OutboundMessage, on_delete=models.SET_NULL, null=True, blank=True)
+    reminded_at = models.DateTimeField(default=timezone.now)
+
+    objects = TenantQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['reminded_at'], name='reminder_time_idx'),
+            models.Index(fields=['client', 'reminded_at'], name='reminder_client_idx'),
+            models.Index(fields=['sales_person', 'reminded_at'], name='reminder_sales_person_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.client or self.sales_person} - {self.stage}"
@@ -0,0 +1,78 @@
+from django.db import IntegrityError, transaction
+
+from .models import Bill, Payment
+
+
+class PaymentError(Exception):
+    # status is the HTTP status the JSON endpoint answers with
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def parse_payment(amount, payment_mode, cheque_number=None):
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        raise PaymentError("amount must be a number")
+    if amount <= 0:
+        raise PaymentError("amount must be positive")
+    if payment_mode not in dict(Payment.PAYMENT_CHOICES):
+        raise PaymentError("payment_mode must be cash or cheque")
+    cheque_number = (cheque_number or '').strip() or None
+    if payment_mode == 'cheque' and not cheque_number:
+        raise PaymentError("cheque_number is required for cheque payments")
+    return amount, payment_mode, cheque_number if payment_mode == 'cheque' else None
+
+
+def record_payment(bill, amount, payment_mode, cheque_number=None, idempotency_key=None):
+    """Record a payment against `bill` and return (payment, created).
+
+    The bill row is locked and paid_amount is increased in SQL, so payments
+    posted at the same time all count. A repeated `idempotency_key` for the
+    same shop returns the payment it first recorded with created=False.
+    """
+    amount, payment_mode, cheque_number = parse_payment(amount, payment_mode, cheque_number)
+    idempotency_key = (idempotency_key or '').strip() or None
+    if idempotency_key and len(idempotency_key) > 64:
+        raise PaymentError("idempotency_key is longer than 64 characters")
+
+    try:
+        with transaction.atomic():
+            bill = Bill.objects.select_for_update().get(pk=bill.pk)
+            if idempotency_key:
+                existing = _existing_payment(bill, idempotency_key)
+                if existing:
+                    return _replay(existing, bill, amount, payment_mode), False
+
+            if amount > bill.pending_amount():
+                raise PaymentError(f"amount exceeds the pending {bill.pending_amount():.2f}", status=409)
+
+            payment = Payment.objects.create(
+                shop_id=bill.shop_id,
+                bill=bill,
+                amount=amount,
+                payment_mode=payment_mode,
+                cheque_number=cheque_number,
+                idempotency_key=idempotency_key,
+            )
+            bill.apply_payment(amount)
+    except IntegrityError:
+        # a concurrent request with the same key committed first
+        existing = _existing_payment(bill, idempotency_key) if idempotency_key else None
+        if existing is None:
+            raise
+        return _replay(existing, bill, amount, payment_mode), False
+
+    payment.bill = bill
+    return payment, True
+
+
+def _existing_payment(bill, idempotency_key):
+    return Payment.objects.filter(shop_id=bill.shop_id, idempotency_key=idempotency_key).select_related('bill').first()
+
+
+def _replay(payment, bill, amount, payment_mode):
+    if (payment.bill_id, payment.amount, payment.payment_mode) != (bill.id, amount, payment_mode):
+        raise PaymentError("idempotency_key was already used for a different payment", status=422)
+    return payment
@@ -0,0 +1,87 @@
+# Statement PDF rendering with ReportLab.
+#
+# Only plain data goes in, so this module does not touch Django and can run
+# inside process-pool workers.
+import time
+from io import BytesIO
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+
+
+def build_statement_pdf(data):
+    # Create PDF using ReportLab
+    buffer = BytesIO()
+    doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
+    story = []
+    styles = getSampleStyleSheet()
+    
+    # Title
+    title_style = ParagraphStyle(
+        'CustomTitle',
+        parent=styles['Heading1'],
+        fontSize=16,
+        textColor=colors.HexColor('#000000'),
+        spaceAfter=20,
+    )
+    client = data['client']
+    from_date = data['from_date']
+    to_date = data['to_date']
+    total_billed = data['total_billed']
+    total_paid = data['total_paid']
+
+    story.append(Paragraph(f"Statement for {client['name']}", title_style))
+    story.append(Spacer(1, 0.2*inch))
+    
+    # Client Details
+    detail_style = styles['Normal']
+    story.append(Paragraph(f"<b>Client Name:</b> {client['name']}", detail_style))
+    story.append(Paragraph(f"<b>Phone:</b> {client['phone']}", detail_style))
+    story.append(Paragraph(f"<b>Address:</b> {client['address'] or 'N/A'}", detail_style))
+    if from_date or to_date:
+        date_range = f"{from_date or 'Start'} to {to_date or 'End'}"
+        story.append(Paragraph(f"<b>Period:</b> {date_range}", detail_style))
+    story.append(Spacer(1, 0.3*inch))
+    
+    # Bills Table
+    table_data = [['Bill No', 'Date', 'Amount', 'Paid', 'Pending']]
+    for bill_number, bill_date, total_amount, paid_amount, pending in data['rows']:
+        table_data.append([
+            str(bill_number),
+            bill_date.strftime('%d-%m-%Y'),
+            f"₹{total_amount:.2f}",
+            f"₹{paid_amount:.2f}",
+            f"₹{pending:.2f}",
+        ])
+    
+    # Add totals row
+    table_data.append(['TOTAL', '', f"₹{total_billed:.2f}", f"₹{total_paid:.2f}", f"₹{total_billed - total_paid:.2f}"])
+    
+    table = Table(table_data, colWidths=[1.2*inch, 1.2*inch, 1.2*inch, 1.2*inch, 1.2*inch])
+    table.setStyle(TableStyle([
+        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4CAF50')),
+        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+        ('FONTSIZE', (0, 0), (-1, 0), 12),
+        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E0E0E0')),
+        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
+        ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ]))
+    story.append(table)
+    
+    # Build PDF
+    doc.build(story)
+    return buffer.getvalue()
+
+
+def render_statement_job(job):
+    """Process-pool entry point: (name, data) -> (name, pdf bytes, seconds)."""
+    name, data = job
+    started = time.perf_counter()
+    pdf = build_statement_pdf(data)
+    return name, pdf, time.perf_counter() - started
@@ -0,0 +1,147 @@
+import csv
+from contextlib import nullcontext
+
+from django.db import transaction
+from django.utils import timezone
+
+from .imports import RowError, read_amount
+from .models import Bill, DailyCollection, Payment, ShopCollectionSummary
+from .signals import bump_shop_data_version, bump_statement_version
+
+
+RECEIPT_COLUMNS = ('bill_number', 'amount', 'payment_mode', 'cheque_number')
+REPORT_HEADER = ['line', 'bill_number', 'amount', 'status', 'message']
+
+
+class ReconciliationResult:
+    def __init__(self):
+        self.rows = 0
+        self.matched = 0
+        self.amount_applied = 0.0
+        # (line, bill_number, amount, status, message) for every entry not applied cleanly
+        self.report = []
+
+    def flag(self, line, bill_number, amount, status, message):
+        self.report.append((line, bill_number, amount, status, message))
+
+    def count(self, status):
+        return sum(1 for entry in self.report if entry[3] == status)
+
+
+def parse_receipt(row):
+    bill_number = (row.get('bill_number') or '').strip()
+    if not bill_number:
+        raise RowError("missing bill_number")
+    amount = read_amount(row, 'amount')
+    if amount <= 0:
+        raise RowError("amount must be positive")
+    payment_mode = (row.get('payment_mode') or 'cash').strip().lower()
+    if payment_mode not in dict(Payment.PAYMENT_CHOICES):
+        raise RowError(f"payment_mode: {payment_mode!r} is not cash or cheque")
+    cheque_number = (row.get('cheque_number') or '').strip() or None
+    if payment_mode == 'cheque' and not cheque_number:
+        raise RowError("cheque_number is required for cheque payments")
+    return bill_number, amount, payment_mode, cheque_number
+
+
+def reconcile_payments(shop, lines, batch_size=1000, allow_overpayment=False, dry_run=False):
+    """Match a file of cash and cheque receipts to `shop`'s bills by number.
+
+    Each batch locks its bills with one query on (shop, bill_number),
+    bulk-creates the payments and writes every touched bill's paid amount
+    with one bulk_update. Receipts for unknown or duplicated bill numbers,
+    and receipts that would take a bill past its total (unless
+    `allow_overpayment`), are left out and listed in `result.report`.
+    """
+    result = ReconciliationResult()
+    reader = csv.DictReader(lines)
+    missing = [column for column in ('bill_number', 'amount') if column not in (reader.fieldnames or ())]
+    if missing:
+        result.flag(1, '', '', 'invalid', f"header is missing {', '.join(missing)}")
+        return result
+
+    touched_clients = set()
+    with transaction.atomic() if dry_run else nullcontext():
+        batch = []
+        try:
+            for row in reader:
+                result.rows += 1
+                batch.append((reader.line_num, row))
+                if len(batch) >= batch_size:
+                    _reconcile_batch(shop, batch, result, allow_overpayment, touched_clients)
+                    batch = []
+        except csv.Error as e:
+            result.flag(reader.line_num, '', '', 'invalid', f"unreadable CSV, stopped here: {e}")
+        if batch:
+            _reconcile_batch(shop, batch, result, allow_overpayment, touched_clients)
+
+        if dry_run:
+            transaction.set_rollback(True)
+        elif touched_clients:
+            # bulk_update skips Bill.save() and the signals, so catch up once
+            ShopCollectionSummary.rebuild(shop.id, timezone.localdate())
+            bump_statement_version(touched_clients)
+            bump_shop_data_version([shop.id])
+
+    result.report.sort(key=lambda entry: entry[0])
+    return result
+
+
+def _reconcile_batch(shop, batch, result, allow_overpayment, touched_clients):
+    receipts = []
+    for line, row in batch:
+        try:
+            receipts.append((line, *parse_receipt(row)))
+        except RowError as e:
+            result.flag(line, (row.get('bill_number') or '').strip(), row.get('amount') or '', 'invalid', str(e))
+
+    with transaction.atomic():
+        bills = {}
+        duplicated = set()
+        for bill in (
+            Bill.objects.for_shop(shop)
+            .filter(bill_number__in={receipt[1] for receipt in receipts})
+            .select_for_update()
+        ):
+            if bill.bill_number in bills:
+                duplicated.add(bill.bill_number)
+            bills[bill.bill_number] = bill
+
+        payments = []
+        changed = {}
+        for line, bill_number, amount, payment_mode, cheque_number in receipts:
+            bill = bills.get(bill_number)
+            if bill is None:
+                result.flag(line, bill_number, amount, 'unmatched', "no bill with this number")
+                continue
+            if bill_number in duplicated:
+                result.flag(line, bill_number, amount, 'unmatched', "several bills share this number")
+                continue
+
+            pending = bill.pending_amount()
+            if amount > pending:
+                message = f"pays {amount:g} against {pending:g} pending"
+                if not allow_overpayment:
+                    result.flag(line, bill_number, amount, 'overpaid', message + "; not recorded")
+                    continue
+                result.flag(line, bill_number, amount, 'overpaid', message + "; recorded")
+
+            bill.paid_amount += amount
+            bill.is_open = bill.pending_amount() > 0
+            changed[bill.id] = bill
+            payments.append(Payment(
+                shop=shop,
+                bill=bill,
+                sales_person_id=bill.sales_person_id,
+                amount=amount,
+                payment_mode=payment_mode,
+                cheque_number=cheque_number,
+            ))
+            result.matched += 1
+            result.amount_applied += amount
+
+        Payment.objects.bulk_create(payments)
+        DailyCollection.record_payments(payments)
+        Bill.objects.bulk_update(changed.values(), ['paid_amount', 'is_open'])
+
+    touched_clients.update(bill.client_id for bill in changed.values())
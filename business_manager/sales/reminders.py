@@ -0,0 +1,251 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+
+from .messaging import whatsapp_number
+from .models import Bill, OutboundMessage, ReminderLog, Shop
+
+
+STAGE_CLOSINGS = {
+    'gentle': "Kindly arrange payment.",
+    'firm': "Please clear these bills at the earliest.",
+    'final': "This is a final reminder. Please pay immediately to avoid a hold on further orders.",
+}
+
+
+def escalation_stage(overdue_days):
+    """The (min_days, stage, cooldown_days, alert_sales_person) entry for a bill this late."""
+    stage = None
+    for entry in sorted(settings.REMINDER_ESCALATION):
+        if overdue_days >= entry[0]:
+            stage = entry
+    return stage
+
+
+class ReminderCampaign:
+    def __init__(self, today, now):
+        self.today = today
+        self.now = now
+        self.clients = {}
+        self.sales_people = {}
+        self.cooling_down = 0
+        self.sales_people_cooling_down = 0
+        self.without_number = 0
+        self.logs = []
+
+    def add(self, other):
+        self.clients.update(other.clients)
+        self.sales_people.update(other.sales_people)
+        self.cooling_down += other.cooling_down
+        self.sales_people_cooling_down += other.sales_people_cooling_down
+        self.without_number += other.without_number
+        self.logs.extend(other.logs)
+
+    @property
+    def messages(self):
+        return [log.message for log in self.logs]
+
+    def bill_count(self):
+        return sum(log.bill_count for log in self.logs if log.client_id)
+
+
+def _overdue(today, shop_ids=None):
+    # is_open + due_date is bill_open_due_idx (bill_shop_open_due_idx per shop)
+    first_stage = min(entry[0] for entry in settings.REMINDER_ESCALATION)
+    bills = Bill.objects.filter(is_open=True, due_date__lte=today - timedelta(days=first_stage))
+    if shop_ids is not None:
+        bills = bills.filter(shop_id__in=shop_ids)
+    return bills
+
+
+def overdue_shop_ids(today, shop_ids=None):
+    return list(_overdue(today, shop_ids).order_by('shop_id').values_list('shop_id', flat=True).distinct())
+
+
+def overdue_bills(today, shop_ids=None):
+    return _overdue(today, shop_ids).order_by('client_id', 'due_date').values_list(
+        'shop_id', 'client_id', 'client__name', 'client__phone',
+        'sales_person_id', 'sales_person__profile__phone',
+        'bill_number', 'due_date', 'total_amount', 'paid_amount',
+    )
+
+
+def plan_reminders(today=None, shop_ids=None):
+    """Group every overdue bill per client and per sales person.
+
+    Each client gets one entry with all their overdue bills, staged by the
+    oldest one. Each sales person gets one entry per shop listing the
+    clients of theirs that are being reminded, when a client's stage asks
+    for it. Clients reminded within their stage's cool-down are left out,
+    and so are sales people alerted in that shop within the cool-down of
+    the latest stage they would be alerted for.
+    """
+    now = timezone.now()
+    campaign = ReminderCampaign(today or timezone.localdate(), now)
+
+    for (shop_id, client_id, name, phone, sales_person_id, sales_phone,
+         bill_number, due_date, total_amount, paid_amount) in overdue_bills(campaign.today, shop_ids):
+        client = campaign.clients.setdefault(client_id, {
+            'shop_id': shop_id,
+            'name': name,
+            'phone': phone,
+            'bills': [],
+        })
+        client['bills'].append((
+            bill_number,
+            total_amount - paid_amount,
+            (campaign.today - due_date).days,
+            sales_person_id,
+            sales_phone,
+        ))
+
+    longest_cooldown = max(entry[2] for entry in settings.REMINDER_ESCALATION)
+    recent_logs = ReminderLog.objects.filter(reminded_at__gte=now - timedelta(days=longest_cooldown))
+    if shop_ids is not None:
+        recent_logs = recent_logs.filter(shop_id__in=shop_ids)
+    last_reminded = dict(
+        recent_logs
+        .filter(client__isnull=False)
+        .values('client_id')
+        .annotate(last=Max('reminded_at'))
+        .values_list('client_id', 'last')
+    )
+
+    for client_id, client in list(campaign.clients.items()):
+        # bills are ordered by due date, so the first is the oldest
+        client['stage'] = escalation_stage(client['bills'][0][2])
+        last = last_reminded.get(client_id)
+        if last and last + timedelta(days=client['stage'][2]) > now:
+            campaign.cooling_down += 1
+            del campaign.clients[client_id]
+            continue
+
+        if not client['stage'][3]:
+            continue
+        for bill_number, pending, days, sales_person_id, sales_phone in client['bills']:
+            if sales_person_id is None or whatsapp_number(sales_phone) is None:
+                continue
+            entry = campaign.sales_people.setdefault((client['shop_id'], sales_person_id), {
+                'phone': sales_phone,
+                'clients': {},
+            })
+            entry['clients'].setdefault(client_id, []).append((bill_number, pending, days))
+
+    last_alerted = {
+        (shop_id, sales_person_id): last
+        for shop_id, sales_person_id, last in (
+            recent_logs
+            .filter(sales_person__isnull=False)
+            .values('shop_id', 'sales_person_id')
+            .annotate(last=Max('reminded_at'))
+            .values_list('shop_id', 'sales_person_id', 'last')
+        )
+    }
+    for key, entry in list(campaign.sales_people.items()):
+        entry['stage'] = max(campaign.clients[client_id]['stage'] for client_id in entry['clients'])
+        last = last_alerted.get(key)
+        if last and last + timedelta(days=entry['stage'][2]) > now:
+            campaign.sales_people_cooling_down += 1
+            del campaign.sales_people[key]
+
+    for client_id, client in campaign.clients.items():
+        recipient = whatsapp_number(client['phone'])
+        if recipient is None:
+            # nothing to send; their sales person is still alerted
+            campaign.without_number += 1
+            continue
+        campaign.logs.append(ReminderLog(
+            shop_id=client['shop_id'],
+            client_id=client_id,
+            stage=client['stage'][1],
+            bill_count=len(client['bills']),
+            pending_amount=sum(bill[1] for bill in client['bills']),
+            reminded_at=now,
+            message=OutboundMessage(
+                shop_id=client['shop_id'],
+                recipient=recipient,
+                body=client_message(client),
+            ),
+        ))
+
+    for (shop_id, sales_person_id), entry in campaign.sales_people.items():
+        bills = [bill for bills in entry['clients'].values() for bill in bills]
+        campaign.logs.append(ReminderLog(
+            shop_id=shop_id,
+            sales_person_id=sales_person_id,
+            stage=entry['stage'][1],
+            bill_count=len(bills),
+            pending_amount=sum(bill[1] for bill in bills),
+            reminded_at=now,
+            message=OutboundMessage(
+                shop_id=shop_id,
+                recipient=whatsapp_number(entry['phone']),
+                body=sales_person_message(entry, campaign.clients),
+            ),
+        ))
+    return campaign
+
+
+def send_reminders(today=None, shop_ids=None):
+    """Queue one consolidated reminder per client and sales person, and log them.
+
+    Shops are planned one at a time, each with only its own row locked while
+    the cool-down is checked and its messages are queued, so two overlapping
+    runs cannot remind anyone twice and other work on the shop waits for one
+    shop's inserts at most.
+    """
+    today = today or timezone.localdate()
+    campaign = ReminderCampaign(today, timezone.now())
+    for shop_id in overdue_shop_ids(today, shop_ids):
+        with transaction.atomic():
+            if not list(Shop.objects.select_for_update().filter(id=shop_id).values_list('id', flat=True)):
+                continue
+            shop_campaign = plan_reminders(today, [shop_id])
+            OutboundMessage.objects.bulk_create(shop_campaign.messages)
+            ReminderLog.objects.bulk_create(shop_campaign.logs)
+        campaign.add(shop_campaign)
+    return campaign
+
+
+def _bill_lines(bills, indent="- "):
+    limit = settings.REMINDER_MAX_LINES
+    lines = [
+        f"{indent}Bill No {bill_number}: ₹{pending:.2f}, {days} days overdue"
+        for bill_number, pending, days, *_ in bills[:limit]
+    ]
+    if len(bills) > limit:
+        rest = bills[limit:]
+        lines.append(f"{indent}and {len(rest)} more bill(s): ₹{sum(bill[1] for bill in rest):.2f}")
+    return lines
+
+
+def client_message(client):
+    bills = client['bills']
+    lines = [
+        f"Hi {client['name']},",
+        "",
+        f"{len(bills)} of your bills are overdue:" if len(bills) > 1 else "Your bill is overdue:",
+        *_bill_lines(bills),
+        f"Total pending: ₹{sum(bill[1] for bill in bills):.2f}",
+        "",
+        STAGE_CLOSINGS.get(client['stage'][1], STAGE_CLOSINGS['gentle']),
+        "",
+        "– Suhagan Creations, Thank You.",
+    ]
+    return "\n".join(lines)
+
+
+def sales_person_message(entry, clients):
+    lines = ["Alert 🚨", "", "Overdue follow-ups:"]
+    for client_id, bills in entry['clients'].items():
+        client = clients[client_id]
+        lines.append(
+            f"{client['name']} ({client['stage'][1]}): {len(bills)} bill(s), "
+            f"₹{sum(bill[1] for bill in bills):.2f} pending"
+        )
+        lines.extend(_bill_lines(bills, indent="  - "))
+    lines.extend(["", "Please follow up immediately."])
+    return "\n".join(lines)
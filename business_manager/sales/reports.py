@@ -0,0 +1,152 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F, Q, Sum
+from django.db.models.functions import Coalesce, TruncDay, TruncMonth, TruncWeek
+from django.utils import timezone
+
+from .models import Bill, Payment
+
+
+AGING_BUCKETS = ('0-30', '31-60', '61-90', '90+')
+
+
+def aging_cache_key(shop, today=None):
+    # every bill write bumps shop.data_version in its own transaction, so a
+    # report is never served after a committed change and nothing needs deleting
+    return f"aging-report:{shop.id}:{shop.data_version}:{today or timezone.localdate()}"
+
+
+def _aging_filters(today):
+    # days overdue = today - due_date; bills not yet due count as 0 days
+    return {
+        '0-30': Q(due_date__gte=today - timedelta(days=30)),
+        '31-60': Q(due_date__lt=today - timedelta(days=30), due_date__gte=today - timedelta(days=60)),
+        '61-90': Q(due_date__lt=today - timedelta(days=60), due_date__gte=today - timedelta(days=90)),
+        '90+': Q(due_date__lt=today - timedelta(days=90)),
+    }
+
+
+def _empty_row(**fields):
+    return {**fields, 'buckets': dict.fromkeys(AGING_BUCKETS, 0.0), 'total': 0.0}
+
+
+def compute_aging_report(shop_id, today=None):
+    """Outstanding amounts per aging bucket, by client and by sales person.
+
+    A single grouped query over the shop's open bills does the bucketing;
+    the per-client and per-sales-person tables are rolled up from its rows.
+    """
+    today = today or timezone.localdate()
+    pending = F('total_amount') - F('paid_amount')
+    annotations = {
+        f'bucket_{index}': Coalesce(Sum(pending, filter=bucket_filter), 0.0)
+        for index, bucket_filter in enumerate(_aging_filters(today).values())
+    }
+
+    rows = (
+        Bill.objects
+        .filter(shop_id=shop_id, is_open=True)
+        .values('client_id', 'client__name', 'client__phone', 'sales_person_id', 'sales_person__username')
+        .annotate(**annotations)
+        .order_by()
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+
+    clients = {}
+    sales_people = {}
+    totals = _empty_row()
+
+    for row in rows:
+        client = clients.setdefault(row['client_id'], _empty_row(
+            client_id=row['client_id'],
+            name=row['client__name'],
+            phone=row['client__phone'],
+        ))
+        sales_person = sales_people.setdefault(row['sales_person_id'], _empty_row(
+            sales_person_id=row['sales_person_id'],
+            name=row['sales_person__username'] or 'Unassigned',
+        ))
+        for index, bucket in enumerate(AGING_BUCKETS):
+            amount = row[f'bucket_{index}']
+            for target in (client, sales_person, totals):
+                target['buckets'][bucket] += amount
+                target['total'] += amount
+
+    def with_amounts(row):
+        # bucket amounts as a list in AGING_BUCKETS order, for templates
+        row['amounts'] = [row['buckets'][bucket] for bucket in AGING_BUCKETS]
+        return row
+
+    def ordered(rows):
+        return sorted((with_amounts(row) for row in rows.values()), key=lambda row: row['total'], reverse=True)
+
+    return {
+        'today': today,
+        'buckets': AGING_BUCKETS,
+        'by_client': ordered(clients),
+        'by_sales_person': ordered(sales_people),
+        'totals': with_amounts(totals),
+    }
+
+
+def aging_report(shop):
+    today = timezone.localdate()
+    key = aging_cache_key(shop, today)
+    report = cache.get(key)
+    if report is None:
+        report = compute_aging_report(shop.id, today)
+        cache.set(key, report, settings.AGING_REPORT_CACHE_SECONDS)
+    return report
+
+
+TREND_PERIODS = {'day': TruncDay, 'week': TruncWeek, 'month': TruncMonth}
+TREND_GROUPS = {'mode': 'payment_mode', 'sales_person': 'sales_person__username', 'none': None}
+
+
+def collection_trends(rollup, period='week', group_by='mode'):
+    """Collections per day, week or month from DailyCollection rows.
+
+    `rollup` is a DailyCollection queryset already narrowed to the shops and
+    dates wanted; payments themselves are never read. Each row has one
+    amount per series (payment mode, sales person, or a single total).
+    """
+    group_field = TREND_GROUPS[group_by]
+    fields = ['period'] + ([group_field] if group_field else [])
+    grouped = (
+        rollup
+        .annotate(period=TREND_PERIODS[period]('date'))
+        .values(*fields)
+        .annotate(amount=Sum('amount'), count=Sum('count'))
+        .order_by('period')
+    )
+
+    labels = {'payment_mode': dict(Payment.PAYMENT_CHOICES)}.get(group_field, {})
+    periods = {}
+    series = set()
+    for row in grouped:
+        if group_field:
+            name = row[group_field]
+            name = labels.get(name, name) or 'Unassigned'
+        else:
+            name = 'Total'
+        series.add(name)
+        entry = periods.setdefault(row['period'], {'period': row['period'], 'by_series': {}, 'total': 0.0, 'count': 0})
+        entry['by_series'][name] = entry['by_series'].get(name, 0.0) + row['amount']
+        entry['total'] += row['amount']
+        entry['count'] += row['count']
+
+    series = sorted(series)
+    rows = list(periods.values())
+    for entry in rows:
+        # amounts as a list in series order, for templates and the JSON API
+        entry['amounts'] = [entry['by_series'].get(name, 0.0) for name in series]
+    return {
+        'period': period,
+        'group_by': group_by,
+        'series': series,
+        'rows': rows,
+        'total': sum(entry['total'] for entry in rows),
+        'peak': max((entry['total'] for entry in rows), default=0.0),
+    }
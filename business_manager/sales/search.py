@@ -0,0 +1,48 @@
+import re
+import unicodedata
+
+from django.db import connection
+from django.db.models import Q
+
+
+TOKEN_LENGTH = 30
+MAX_TOKENS = 10
+COUNTRY_CODE = '91'
+NATIONAL_DIGITS = 10
+
+
+def normalize_phone(phone):
+    """Digits of a phone number without trunk prefix or country code,
+    so "+91 98765-43210", "098765 43210" and "9876543210" all match.
+    None when the phone has no digits to match or send to."""
+    digits = re.sub(r'\D', '', phone or '').lstrip('0')
+    if len(digits) == NATIONAL_DIGITS + len(COUNTRY_CODE) and digits.startswith(COUNTRY_CODE):
+        digits = digits[len(COUNTRY_CODE):]
+    return digits or None
+
+
+def name_tokens(name):
+    """Casefolded words of a name, without accents on Latin letters
+    ("Zébédée" -> "zebedee"). Other scripts keep their vowel signs."""
+    chars = []
+    base = ''
+    for char in unicodedata.normalize('NFKD', name or '').casefold():
+        if unicodedata.category(char).startswith('M'):
+            if base >= '\u0250':
+                chars.append(char)
+        elif char.isalnum():
+            base = char
+            chars.append(char)
+        else:
+            base = ''
+            chars.append(' ')
+    words = unicodedata.normalize('NFC', ''.join(chars)).split()
+    return list(dict.fromkeys(word[:TOKEN_LENGTH] for word in words))[:MAX_TOKENS]
+
+
+def prefix_filter(field, prefix):
+    if connection.vendor == 'postgresql':
+        # LIKE 'prefix%' is served by the varchar_pattern_ops indexes
+        return Q(**{f'{field}__startswith': prefix})
+    # SQLite only uses an index for LIKE on NOCASE columns, but does for a range
+    return Q(**{f'{field}__gte': prefix, f'{field}__lt': prefix + '\U0010ffff'})
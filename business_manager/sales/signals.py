@@ -1,7 +1,9 @@
-from django.db.models.signals import post_save
+from django.db.models import F
+from django.db.models.signals import post_save, post_delete, pre_delete
 from django.contrib.auth.models import User
 from django.dispatch import receiver
-from .models import Shop
+from django.utils import timezone
+from .models import Shop, Client, Bill, DailyCollection, Payment, ShopCollectionSummary
 
 @receiver(post_save, sender=User)
 def create_user_shop(sender, instance, created, **kwargs):
@@ -9,4 +11,64 @@ def create_user_shop(sender, instance, created, **kwargs):
         Shop.objects.create(
             name=f"{instance.username}'s Shop",
             owner=instance
-        )
\ No newline at end of file
+        )
+
+
+@receiver(post_delete, sender=Bill)
+def remove_bill_from_summary(sender, instance, **kwargs):
+    # never create a summary row here: the shop itself may be mid-delete
+    ShopCollectionSummary.apply_change(instance.collection_state(), None, create=False)
+
+
+def bump_statement_version(client_ids):
+    client_ids = {client_id for client_id in client_ids if client_id}
+    if client_ids:
+        Client.objects.filter(id__in=client_ids).update(statement_version=F('statement_version') + 1)
+
+
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+def bill_changed(sender, instance, **kwargs):
+    # a bill moved to another client changes both statements
+    bump_statement_version([instance.client_id, getattr(instance, '_loaded_client_id', None)])
+
+
+@receiver(post_delete, sender=Payment)
+def remove_payment_from_rollup(sender, instance, **kwargs):
+    # never create a rollup row here, the shop may be mid-delete
+    DailyCollection.apply_change(instance.rollup_state(), None, create=False)
+
+
+@receiver(pre_delete, sender=User)
+def merge_sales_person_rollup(sender, instance, **kwargs):
+    # their rows are about to be set to NULL, which would collide with the
+    # shop's existing no-sales-person rows; fold them in first
+    rows = DailyCollection.objects.filter(sales_person=instance)
+    for row in rows:
+        DailyCollection.add(row.shop_id, row.date, row.payment_mode, None, row.amount, row.count)
+    rows.delete()
+
+
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def payment_changed(sender, instance, **kwargs):
+    bump_statement_version(Bill.objects.filter(id=instance.bill_id).values_list('client_id', flat=True))
+
+
+def bump_shop_data_version(shop_ids):
+    shop_ids = {shop_id for shop_id in shop_ids if shop_id}
+    if shop_ids:
+        Shop.objects.filter(id__in=shop_ids).update(
+            data_version=F('data_version') + 1,
+            data_changed_at=timezone.now(),
+        )
+
+
+@receiver(post_save, sender=Client)
+@receiver(post_delete, sender=Client)
+@receiver(post_save, sender=Bill)
+@receiver(post_delete, sender=Bill)
+@receiver(post_save, sender=Payment)
+@receiver(post_delete, sender=Payment)
+def shop_data_changed(sender, instance, **kwargs):
+    bump_shop_data_version([instance.shop_id])
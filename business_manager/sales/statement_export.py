@@ -0,0 +1,83 @@
+import csv
+import io
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from itertools import groupby
+
+from django.conf import settings
+from django.utils.text import slugify
+
+from .models import Bill, Client
+from .pdf import render_statement_job
+from .statements import STATEMENT_FIELDS, STATEMENT_ORDERING, Statement, filter_statement_bills
+from .streaming import iter_zip, ordered_pool_map
+
+
+def statement_jobs(shop, from_date=None, to_date=None):
+    """One (filename, pdf data) job per client of the shop.
+
+    Bills and payments for the whole shop are read in a single streamed
+    query ordered by client, so memory does not grow with the number of
+    clients.
+    """
+    rows = (
+        filter_statement_bills(Bill.objects.filter(shop=shop), from_date, to_date)
+        .order_by('client_id', *STATEMENT_ORDERING)
+        .values_list('client_id', *STATEMENT_FIELDS)
+        .iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    )
+    rows_by_client = groupby(rows, key=lambda row: row[0])
+    next_group = next(rows_by_client, None)
+
+    clients = Client.objects.filter(shop=shop).order_by('id').iterator(chunk_size=settings.EXPORT_CHUNK_SIZE)
+    for client in clients:
+        # skip bills whose client is not in this shop's client list
+        while next_group is not None and next_group[0] < client.id:
+            next_group = next(rows_by_client, None)
+
+        client_rows = []
+        if next_group is not None and next_group[0] == client.id:
+            client_rows = [row[1:] for row in next_group[1]]
+            next_group = next(rows_by_client, None)
+
+        statement = Statement(client, client_rows, from_date, to_date)
+        name = f"{client.id}_{slugify(client.name) or 'client'}_statement.pdf"
+        yield name, statement.pdf_data()
+
+
+def render_statements(jobs, workers=None):
+    """Render jobs, yielding (name, pdf, seconds) in job order.
+
+    With more than one worker they go across a process pool. Workers are
+    spawned rather than forked, so they share no database connection or
+    server threads with the parent; rendering only needs the plain job data.
+    """
+    workers = workers or settings.STATEMENT_EXPORT_WORKERS or os.cpu_count() or 1
+    if workers == 1:
+        yield from map(render_statement_job, jobs)
+        return
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn')) as pool:
+        yield from ordered_pool_map(pool, render_statement_job, jobs, window=workers * 2)
+
+
+def iter_statements_zip(shop, from_date=None, to_date=None, workers=None, timings=None):
+    """Stream a ZIP of every client statement for the shop, plus a timings.csv.
+
+    `workers` defaults to STATEMENT_EXPORT_WORKERS; pass 1 to render in
+    this process, as web requests should.
+    """
+    timings = [] if timings is None else timings
+
+    def entries():
+        for name, pdf, seconds in render_statements(statement_jobs(shop, from_date, to_date), workers):
+            timings.append((name, seconds))
+            yield name, pdf
+
+        report = io.StringIO()
+        writer = csv.writer(report)
+        writer.writerow(['file', 'render_seconds'])
+        writer.writerows((name, f"{seconds:.4f}") for name, seconds in timings)
+        yield 'timings.csv', report.getvalue()
+
+    return iter_zip(entries())
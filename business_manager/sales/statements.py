@@ -0,0 +1,114 @@
+from datetime import date
+
+from django.utils.dateparse import parse_date
+
+from .models import Bill
+
+
+# One row per (bill, payment) pair; bills without payments come back once
+# with the payment columns set to None.
+STATEMENT_FIELDS = (
+    'id', 'bill_number', 'bill_date', 'due_date', 'total_amount', 'paid_amount',
+    'payments__id', 'payments__amount', 'payments__payment_mode',
+    'payments__cheque_number', 'payments__payment_date',
+)
+STATEMENT_ORDERING = ('bill_date', 'id', 'payments__payment_date', 'payments__id')
+
+
+def parse_statement_date(value):
+    if isinstance(value, date):
+        return value
+    try:
+        return parse_date(value or '')
+    except ValueError:
+        return None
+
+
+class StatementPayment:
+    def __init__(self, amount, payment_mode, cheque_number, payment_date):
+        self.amount = amount
+        self.payment_mode = payment_mode
+        self.cheque_number = cheque_number
+        self.payment_date = payment_date
+
+
+class StatementLine:
+    def __init__(self, bill_id, bill_number, bill_date, due_date, total_amount, paid_amount):
+        self.bill_id = bill_id
+        self.bill_number = bill_number
+        self.bill_date = bill_date
+        self.due_date = due_date
+        self.total_amount = total_amount or 0
+        self.paid_amount = paid_amount or 0
+        self.pending = self.total_amount - self.paid_amount
+        self.balance = 0
+        self.payments = []
+
+
+class Statement:
+    """A client's bills, payments and totals for an optional date range.
+
+    Built in one pass over one query, and shared by the HTML page, the PDF
+    renderer and the bulk export.
+    """
+
+    def __init__(self, client, rows, from_date=None, to_date=None):
+        self.client = client
+        self.from_date = from_date
+        self.to_date = to_date
+        self.lines = []
+        self.total_billed = 0
+        self.total_paid = 0
+
+        line = None
+        for (bill_id, bill_number, bill_date, due_date, total_amount, paid_amount,
+             payment_id, amount, payment_mode, cheque_number, payment_date) in rows:
+            if line is None or line.bill_id != bill_id:
+                line = StatementLine(bill_id, bill_number, bill_date, due_date, total_amount, paid_amount)
+                self.total_billed += line.total_amount
+                self.total_paid += line.paid_amount
+                line.balance = self.total_billed - self.total_paid
+                self.lines.append(line)
+            if payment_id is not None:
+                line.payments.append(StatementPayment(amount, payment_mode, cheque_number, payment_date))
+
+    @property
+    def total_pending(self):
+        return self.total_billed - self.total_paid
+
+    def pdf_data(self):
+        # plain data for sales.pdf, picklable for process-pool rendering
+        return {
+            'client': {
+                'name': self.client.name,
+                'phone': self.client.phone,
+                'address': self.client.address,
+            },
+            'rows': [
+                (line.bill_number, line.bill_date, line.total_amount, line.paid_amount, line.pending)
+                for line in self.lines
+            ],
+            'total_billed': self.total_billed,
+            'total_paid': self.total_paid,
+            'from_date': self.from_date,
+            'to_date': self.to_date,
+        }
+
+
+def filter_statement_bills(bills, from_date=None, to_date=None):
+    from_date = parse_statement_date(from_date)
+    to_date = parse_statement_date(to_date)
+    if from_date:
+        bills = bills.filter(bill_date__gte=from_date)
+    if to_date:
+        bills = bills.filter(bill_date__lte=to_date)
+    return bills
+
+
+def build_statement(client, from_date=None, to_date=None):
+    rows = (
+        filter_statement_bills(Bill.objects.filter(client=client), from_date, to_date)
+        .order_by(*STATEMENT_ORDERING)
+        .values_list(*STATEMENT_FIELDS)
+    )
+    return Statement(client, rows, from_date, to_date)
@@ -0,0 +1,74 @@
+import zipfile
+from collections import deque
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+
+class _StreamBuffer:
+    # write-only file object zipfile can target; we drain it after each write
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_zip(entries, compression=zipfile.ZIP_DEFLATED):
+    """Yield a ZIP archive piece by piece from (name, bytes) or (name, iterable of bytes) entries.
+
+    Only the entry being written is held in memory, so archives of any size
+    can go straight into a StreamingHttpResponse or a file.
+    """
+    buffer = _StreamBuffer()
+    with zipfile.ZipFile(buffer, mode='w', compression=compression) as archive:
+        for name, content in entries:
+            if isinstance(content, (bytes, str)):
+                archive.writestr(name, content)
+            else:
+                with archive.open(name, mode='w', force_zip64=True) as member:
+                    for chunk in content:
+                        member.write(chunk)
+                        data = buffer.drain()
+                        if data:
+                            yield data
+            data = buffer.drain()
+            if data:
+                yield data
+    yield buffer.drain()
+
+
+def ordered_pool_map(pool, fn, items, window):
+    """Like pool.map, but never more than `window` items in flight.
+
+    Keeps memory bounded when `items` is a long lazy iterator.
+    """
+    pending = deque()
+    for item in items:
+        pending.append(pool.submit(fn, item))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+async def aiterate(iterator):
+    # Django's ASGI handler would buffer a sync iterator whole, so step
+    # through it on the thread the ORM uses instead
+    next_chunk = sync_to_async(next)
+    while (chunk := await next_chunk(iterator, None)) is not None:
+        yield chunk
+
+
+def streaming_content(iterator):
+    """Body for a StreamingHttpResponse that stays streamed in either server mode."""
+    return aiterate(iterator) if settings.SERVER_MODE == 'asgi' else iterator
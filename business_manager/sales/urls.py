@@ -1,12 +1,27 @@
+from django.conf import settings
 from django.urls import path
 from . import views
 
+# the async views only pay off on an event loop; under WSGI they would each
+# be run through async_to_sync
+ASGI = settings.SERVER_MODE == 'asgi'
+
 urlpatterns = [
-    path('dashboard/', views.collection_dashboard, name='dashboard'),
+    path('dashboard/', views.acollection_dashboard if ASGI else views.collection_dashboard, name='dashboard'),
     path('mark-paid/<int:bill_id>/', views.mark_as_paid, name='mark_as_paid'),
+    path('api/bills/<int:bill_id>/payments/', views.record_payment_api, name='api_record_payment'),
+    path('api/bills/open/', views.api_open_bills, name='api_open_bills'),
+    path('api/clients/summary/', views.api_client_summary, name='api_client_summary'),
+    path('api/clients/search/', views.api_client_search, name='api_client_search'),
+    path('api/clients/<int:client_id>/statement/', views.api_client_statement, name='api_client_statement'),
+    path('api/collections/trends/', views.api_collection_trends, name='api_collection_trends'),
     path('client-summary/', views.client_outstanding_summary,name='client_summary'),
     path('client/<int:client_id>/bills/', views.client_bills, name='client_bills'),
     path('client/<int:client_id>/statement/',views.client_statement,name='client_statement'),
     path('client/<int:client_id>/statement/pdf/',views.client_statement_pdf,name='client_statement_pdf'),
-    path('send-reminder/<int:bill_id>/', views.send_overdue_reminder, name ='send_reminder'),
+    path('send-reminder/<int:bill_id>/', views.asend_overdue_reminder if ASGI else views.send_overdue_reminder, name ='send_reminder'),
+    path('performance/', views.request_performance, name='request_performance'),
+    path('trends/', views.collection_trends_page, name='collection_trends'),
+    path('aging/', views.receivables_aging, name='aging_report'),
+    path('export/ledger.<str:file_format>', views.ledger_export, name='ledger_export'),
 ]
\ No newline at end of file
@@ -0,0 +1,51 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+
+from .models import Shop
+
+
+_missing = object()
+
+
+def shop_generation(user):
+    """The user's shops and their data versions, e.g. "4:17,9:3".
+
+    Every client, bill or payment write bumps its shop's data_version (see
+    sales.signals), so anything cached under this string is never served
+    after the data it was built from has changed. The counters live in the
+    database, so every gunicorn worker sees the same generation.
+    """
+    versions = Shop.objects.for_user(user).order_by('id').values_list('id', 'data_version')
+    return ",".join(f"{shop_id}:{version}" for shop_id, version in versions)
+
+
+async def ashop_generation(user):
+    versions = Shop.objects.for_user(user).order_by('id').values_list('id', 'data_version')
+    return ",".join([f"{shop_id}:{version}" async for shop_id, version in versions])
+
+
+def _key(key_parts):
+    return "view:" + hashlib.sha256("\x1f".join(map(str, key_parts)).encode()).hexdigest()
+
+
+def cached(key_parts, compute, timeout=None):
+    # key_parts must include a generation counter; old entries are never
+    # deleted, they just stop being asked for and expire
+    key = _key(key_parts)
+    value = cache.get(key, _missing)
+    if value is _missing:
+        value = compute()
+        cache.set(key, value, settings.VIEW_CACHE_SECONDS if timeout is None else timeout)
+    return value
+
+
+async def acached(key_parts, compute, timeout=None):
+    # as cached(), for async views; compute returns an awaitable
+    key = _key(key_parts)
+    value = await cache.aget(key, _missing)
+    if value is _missing:
+        value = await compute()
+        await cache.aset(key, value, settings.VIEW_CACHE_SECONDS if timeout is None else timeout)
+    return value
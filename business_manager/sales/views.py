@@ -1,43 +1,41 @@
-from django.shortcuts import render, redirect, get_object_or_404
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
 from django.db import models
 from django.utils import timezone
-from django.views.decorators.http import require_POST
-from .models import Bill, Payment, Client, Profile
-from django.db.models import Sum, F
-from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter, A4
+from django.views.decorators.http import require_POST, condition
+from .models import Bill, Payment, Client, DailyCollection, Profile, ReminderLog, Shop, ShopCollectionSummary
+from .messaging import adeliver_now, aenqueue_whatsapp_message, enqueue_whatsapp_message, whatsapp_number
+from .pdf import build_statement_pdf
+from .statements import build_statement, parse_statement_date
+from .reports import TREND_GROUPS, TREND_PERIODS, aging_report, collection_trends
+from .exports import iter_csv, iter_xlsx, ledger_querysets, ledger_rows
+from .payments import PaymentError, record_payment
+from .view_cache import acached, ashop_generation, cached, shop_generation
+from .streaming import streaming_content
+from .instrumentation import RequestMetricsMiddleware, view_percentiles
+from django.db.models import Count, Sum, F, Q
 from django.template.loader import get_template
-from django.http import HttpResponse
-import requests
+from django.http import HttpResponse, HttpResponseBadRequest, StreamingHttpResponse, Http404, JsonResponse
+from django.conf import settings
+from django.middleware.csrf import get_token
+from django.views.csrf import csrf_failure as html_csrf_failure
+from django.core.cache import cache
+from django.utils.cache import patch_cache_control
+from datetime import date, datetime, time, timedelta
+from functools import wraps
 from django.contrib import messages
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch, cm
-from reportlab.lib import colors
+from django.contrib.auth.decorators import login_required
+from django.contrib import admin
+from django.contrib.admin.views.decorators import staff_member_required
 from html.parser import HTMLParser
 import re
+import hashlib
+import json
+import uuid
 
 
-def send_whatsapp_message(phone, message):
-    url = "http://localhost:3000/send-message"
-
-    data = {
-        "number": f"91{phone}",
-        "message": message
-    }
-
-    try:
-        response = requests.post(url, json=data)
-        return response.json()
-    except Exception as e:
-        return {"error": str(e)}
-
-
-
-def send_overdue_reminder(request, bill_id):
-    bill = get_object_or_404(Bill, id=bill_id)
-
+def _reminder_messages(bill):
+    # (phone, message) pairs: the client, then the sales person if they have a phone
     # 🟢 Client Message
     client_message = f"""
 Hi {bill.client.name},
@@ -50,13 +48,10 @@ Kindly arrange payment.
 
 – Suhagan Creations, Thank You.
 """
-
-    send_whatsapp_message(bill.client.phone, client_message)
+    reminders = [(bill.client.phone, client_message)]
 
     # 🟡 Sales Person Notification
     if bill.sales_person and hasattr(bill.sales_person, 'profile'):
-        sales_phone = bill.sales_person.profile.phone
-
         sales_message = f"""
 Alert 🚨
 
@@ -67,74 +62,269 @@ Overdue: {bill.overdue_days()} days
 
 Please follow up immediately.
 """
+        reminders.append((bill.sales_person.profile.phone, sales_message))
+    return reminders
+
+
+def _manual_reminder_log(bill, message):
+    # counts towards the cool-down of the scheduled reminders
+    return ReminderLog(
+        shop_id=bill.shop_id,
+        client=bill.client,
+        stage='manual',
+        bill_count=1,
+        pending_amount=bill.pending_amount(),
+        message=message,
+    )
+
+
+def _reminder_bills(user):
+    return Bill.objects.for_user(user).select_related('client', 'sales_person__profile')
+
 
-        send_whatsapp_message(sales_phone, sales_message)
+@login_required
+@require_POST
+def send_overdue_reminder(request, bill_id):
+    bill = get_object_or_404(_reminder_bills(request.user), id=bill_id)
+    if whatsapp_number(bill.client.phone) is None:
+        messages.error(request, f"{bill.client.name} has no phone number to send a reminder to.")
+        return redirect('dashboard')
+
+    queued = [
+        enqueue_whatsapp_message(phone, message, bill=bill)
+        for phone, message in _reminder_messages(bill)
+    ]
+    _manual_reminder_log(bill, queued[0]).save()
 
-    messages.success(request, "Reminder sent successfully!")
+    messages.success(request, "Reminder queued for sending!")
 
     return redirect('dashboard')
 
 
+@login_required
+@require_POST
+async def asend_overdue_reminder(request, bill_id):
+    # send_overdue_reminder for SERVER_MODE=asgi, see urls.py
+    user = await request.auser()
+    bill = await aget_object_or_404(_reminder_bills(user), id=bill_id)
+    if whatsapp_number(bill.client.phone) is None:
+        messages.error(request, f"{bill.client.name} has no phone number to send a reminder to.")
+        return redirect('dashboard')
+
+    queued = [
+        await aenqueue_whatsapp_message(phone, message, bill=bill)
+        for phone, message in _reminder_messages(bill)
+    ]
+    await _manual_reminder_log(bill, queued[0]).asave()
+    # a sales person without a phone number gets no alert
+    queued = [message for message in queued if message]
+
+    # waiting on the gateway only parks this coroutine, not a worker thread
+    results = await adeliver_now(queued)
+    if len(results) == len(queued) and not any('error' in result for result in results):
+        messages.success(request, "Reminder sent!")
+    else:
+        messages.success(request, "Reminder queued for sending!")
 
-def collection_dashboard(request):
-    today = timezone.localdate()
+    return redirect('dashboard')
 
-    todays_bills = Bill.objects.filter(
-        due_date=today,
-        paid_amount__lt=models.F('total_amount')
-    )
 
-    overdue_bills = Bill.objects.filter(
-        due_date__lt=today,
-        paid_amount__lt=models.F('total_amount')
-    )
 
-    future_bills = Bill.objects.filter(
-         due_date__gt=today,
-         paid_amount__lt=models.F('total_amount')
-    ).order_by('due_date')
+DASHBOARD_SECTIONS = (
+    {
+        'key': 'upcoming',
+        'title': 'Upcoming Collections',
+        'empty_message': 'No Upcomming collections',
+        'show_reminder': False,
+    },
+    {
+        'key': 'today',
+        'title': "Today's Collections",
+        'empty_message': 'No collection Today',
+        'show_reminder': False,
+    },
+    {
+        'key': 'overdue',
+        'title': 'Overdue Bills',
+        'empty_message': 'No overdue bills 🎉',
+        'show_reminder': True,
+    },
+)
+
+
+def open_bill_buckets(open_bills, today):
+    return {
+        'upcoming': open_bills.filter(due_date__gt=today),
+        'today': open_bills.filter(due_date=today),
+        'overdue': open_bills.filter(due_date__lt=today),
+    }
+
 
-    total_pending = (
-        Bill.objects
-        .filter(paid_amount__lt=models.F('total_amount'))
-        .aggregate(
-            pending=models.Sum(models.F('total_amount') - models.F('paid_amount'))
-        )['pending'] or 0
+def encode_cursor(bill):
+    return f"{bill.due_date.isoformat()}_{bill.id}"
+
+
+def decode_cursor(cursor):
+    try:
+        due_date, bill_id = cursor.split('_')
+        return date.fromisoformat(due_date), int(bill_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+def keyset_page(queryset, cursor, page_size):
+    # seek past the last (due_date, id) seen instead of using OFFSET
+    queryset = queryset.order_by('due_date', 'id')
+    position = decode_cursor(cursor)
+    if position:
+        due_date, bill_id = position
+        queryset = queryset.filter(
+            Q(due_date__gt=due_date) | Q(due_date=due_date, id__gt=bill_id)
+        )
+
+    rows = list(queryset[:page_size + 1])
+    next_cursor = encode_cursor(rows[page_size - 1]) if len(rows) > page_size else None
+    return rows[:page_size], next_cursor
+
+
+def _page_url(request, key, cursor):
+    params = request.GET.copy()
+    params.pop('stream', None)
+    if cursor:
+        params[key] = cursor
+    else:
+        params.pop(key, None)
+    return f"?{params.urlencode()}"
+
+
+def _dashboard_section(request, section, queryset, cache_key):
+    page_size = settings.DASHBOARD_PAGE_SIZES.get(section['key'], 50)
+    cursor = request.GET.get(section['key'])
+    bills, next_cursor = cached(
+        cache_key + ['section', section['key'], cursor, page_size],
+        lambda: keyset_page(queryset, cursor, page_size),
     )
 
-    context = {
+    return {
+        **section,
+        'bills': bills,
+        'page_size': page_size,
+        'next_url': _page_url(request, section['key'], next_cursor) if next_cursor else None,
+        'first_url': _page_url(request, section['key'], None) if cursor else None,
+    }
+
+
+def _stream_dashboard(request, context, querysets, cache_key):
+    top = get_template('sales/includes/dashboard_top.html')
+    section_start = get_template('sales/includes/dashboard_section_start.html')
+    rows = get_template('sales/includes/bill_rows.html')
+    section_end = get_template('sales/includes/dashboard_section_end.html')
+    bottom = get_template('sales/includes/dashboard_bottom.html')
+    chunk_size = settings.DASHBOARD_STREAM_CHUNK_SIZE
+
+    yield top.render(context, request)
+
+    # each section's query only runs once the previous sections have been sent
+    for section in DASHBOARD_SECTIONS:
+        section = _dashboard_section(request, section, querysets[section['key']], cache_key)
+        yield section_start.render({'section': section}, request)
+        for i in range(0, len(section['bills']), chunk_size):
+            yield rows.render({
+                'section': section,
+                'bills': section['bills'][i:i + chunk_size],
+                'payment_form_token': context['payment_form_token'],
+            }, request)
+        yield section_end.render({'section': section}, request)
+
+    yield bottom.render(context, request)
+
+
+def _dashboard_context(today, totals):
+    return {
         'today': today,
-        'todays_bills': todays_bills,
-        'overdue_bills': overdue_bills,
-        'future_bills': future_bills,
-        'total_pending': total_pending
+        'total_pending': totals['pending_total'],
+        'totals': totals,
+        # prefix of each payment form's idempotency key, so a double submit records once
+        'payment_form_token': uuid.uuid4().hex,
     }
 
-    return render(request, 'sales/dashboard.html', context)
 
+def _stream_dashboard_response(request, context, querysets, cache_key):
+    # the CSRF cookie has to be set before the response headers go out
+    get_token(request)
+    return StreamingHttpResponse(
+        streaming_content(_stream_dashboard(request, context, querysets, cache_key)),
+        content_type='text/html; charset=utf-8'
+    )
 
-@require_POST
-def mark_as_paid(request, bill_id):
-    bill = get_object_or_404(Bill, id=bill_id)
 
-    paid_now = float(request.POST.get('paid_now', 0))
+@login_required
+def collection_dashboard(request):
+    user = request.user
+    today = timezone.localdate()
 
-    #add partial payment
-    bill.paid_amount = bill.paid_amount or 0
-    bill.paid_amount += paid_now
+    open_bills = Bill.objects.for_user(user).filter(is_open=True).with_status(today).select_related('client')
+    querysets = open_bill_buckets(open_bills, today)
 
-    #safety check: do not exceed total
-    if bill.paid_amount > bill.total_amount:
-        bill.paid_amount = bill.total_amount
+    # rows and totals are cached as data, not HTML: each page carries its own
+    # CSRF and idempotency tokens
+    cache_key = ['dashboard', user.id, shop_generation(user), today]
+    totals = cached(cache_key + ['totals'], lambda: _dashboard_totals(user))
+    context = _dashboard_context(today, totals)
 
-    bill.save()
-    return redirect('dashboard')
+    stream = request.GET.get('stream', '1' if settings.DASHBOARD_STREAMING else '0')
+    if stream == '1':
+        return _stream_dashboard_response(request, context, querysets, cache_key)
+    return _dashboard_page(request, context, querysets, cache_key)
+
+
+@login_required
+async def acollection_dashboard(request):
+    # collection_dashboard for SERVER_MODE=asgi, see urls.py
+    user = await request.auser()
+    today = timezone.localdate()
+
+    open_bills = Bill.objects.for_user(user).filter(is_open=True).with_status(today).select_related('client')
+    querysets = open_bill_buckets(open_bills, today)
+
+    cache_key = ['dashboard', user.id, await ashop_generation(user), today]
+    totals = await acached(cache_key + ['totals'], sync_to_async(lambda: _dashboard_totals(user)))
+    context = _dashboard_context(today, totals)
 
+    stream = request.GET.get('stream', '1' if settings.DASHBOARD_STREAMING else '0')
+    if stream == '1':
+        return _stream_dashboard_response(request, context, querysets, cache_key)
+    # rendering reads the session (messages), which is sync-only
+    return await sync_to_async(_dashboard_page)(request, context, querysets, cache_key)
 
+
+def _dashboard_page(request, context, querysets, cache_key):
+    context['sections'] = [
+        _dashboard_section(request, section, querysets[section['key']], cache_key)
+        for section in DASHBOARD_SECTIONS
+    ]
+    return render(request, 'sales/dashboard.html', context)
+
+
+def _dashboard_totals(user):
+    # header totals come from the maintained per-shop summary rows
+    shop_ids = list(Shop.objects.for_user(user).values_list('id', flat=True))
+    summaries = ShopCollectionSummary.current(shop_ids)
+    return {
+        field: sum(getattr(summary, field) for summary in summaries)
+        for field in (
+            'pending_total', 'overdue_total', 'today_total', 'upcoming_total',
+            'overdue_count', 'today_count', 'upcoming_count',
+        )
+    }
+
+
+@login_required
 def client_outstanding_summary(request):
     clients_summary = (
         Bill.objects
-        .filter(paid_amount__lt=F('total_amount'))
+        .for_user(request.user)
+        .filter(is_open=True)
         .values(
             'client__id',
             'client__name',
@@ -145,39 +335,121 @@ def client_outstanding_summary(request):
         )
         .order_by('-total_pending')
     )
+    clients_summary = cached(
+        ['client-summary', request.user.id, shop_generation(request.user)],
+        lambda: list(clients_summary),
+    )
 
     context = {
         'clients_summary': clients_summary
     }
     return render(request, 'sales/client_summary.html', context)
 
+@login_required
 @require_POST
 def mark_as_paid(request, bill_id):
-    bill = get_object_or_404(Bill, id=bill_id)
-
-    amount = float(request.POST.get('paid_now'))
-    mode = request.POST.get('payment_mode')
-    cheque_no = request.POST.get('cheque_number', '')
-
-    # Create payment record
-    Payment.objects.create(
-        bill=bill,
-        amount=amount,
-        payment_mode=mode,
-        cheque_number=cheque_no if mode == 'cheque' else None
-    )
+    bill = get_object_or_404(Bill.objects.for_user(request.user), id=bill_id)
 
-    # Update bill total paid
-    bill.paid_amount += amount
-    if bill.paid_amount > bill.total_amount:
-        bill.paid_amount = bill.total_amount
+    try:
+        _, created = record_payment(
+            bill,
+            request.POST.get('paid_now'),
+            request.POST.get('payment_mode'),
+            request.POST.get('cheque_number'),
+            idempotency_key=request.POST.get('idempotency_key'),
+        )
+    except PaymentError as e:
+        messages.error(request, f"Payment not recorded: {e}")
+    else:
+        if created:
+            messages.success(request, f"Payment recorded for bill {bill.bill_number}.")
+        else:
+            # a resubmitted form replays the payment it already recorded
+            messages.info(request, f"Payment for bill {bill.bill_number} was already recorded.")
 
-    bill.save()
     return redirect('dashboard')
 
+
+def api_login_required(view):
+    # JSON clients get a 401 instead of a redirect to the login page
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not request.user.is_authenticated:
+            return JsonResponse({'error': 'Authentication required'}, status=401)
+        return view(request, *args, **kwargs)
+    return wrapper
+
+
+def csrf_failure(request, reason=""):
+    # CSRF_FAILURE_VIEW: JSON clients get a JSON 403 instead of Django's HTML page
+    match = request.resolver_match
+    if match and (match.url_name or '').startswith('api_'):
+        return JsonResponse({'error': f"CSRF check failed: {reason}"}, status=403)
+    return html_csrf_failure(request, reason)
+
+
+@api_login_required
+@require_POST
+def record_payment_api(request, bill_id):
+    """JSON body: amount, payment_mode, cheque_number, idempotency_key.
+
+    The key may also come in an Idempotency-Key header. Answers 201 for a
+    new payment and 200 when the key replays an earlier one. Callers use the
+    session cookie, so they must send the csrftoken cookie's value in an
+    X-CSRFToken header; without it the answer is a JSON 403.
+    """
+    bill = Bill.objects.for_user(request.user).filter(id=bill_id).first()
+    if bill is None:
+        return JsonResponse({'error': 'Bill not found'}, status=404)
+
+    try:
+        data = json.loads(request.body or b'{}')
+    except ValueError:
+        return JsonResponse({'error': 'Body must be JSON'}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({'error': 'Body must be a JSON object'}, status=400)
+
+    try:
+        payment, created = record_payment(
+            bill,
+            data.get('amount'),
+            data.get('payment_mode'),
+            data.get('cheque_number'),
+            idempotency_key=data.get('idempotency_key') or request.headers.get('Idempotency-Key'),
+        )
+    except PaymentError as e:
+        return JsonResponse({'error': str(e)}, status=e.status)
+
+    bill = payment.bill
+    return JsonResponse({
+        'payment': {
+            'id': payment.id,
+            'amount': payment.amount,
+            'payment_mode': payment.payment_mode,
+            'cheque_number': payment.cheque_number,
+            'payment_date': payment.payment_date.isoformat(),
+            'idempotency_key': payment.idempotency_key,
+        },
+        'bill': {
+            'id': bill.id,
+            'bill_number': bill.bill_number,
+            'paid_amount': bill.paid_amount,
+            'pending_amount': bill.pending_amount(),
+            'is_open': bill.is_open,
+        },
+        'created': created,
+    }, status=201 if created else 200)
+
+@login_required
 def client_bills(request, client_id):
-    client = get_object_or_404(Client, id=client_id)
-    bills = Bill.objects.filter(client=client)
+    client = get_object_or_404(Client.objects.for_user(request.user), id=client_id)
+    bills = (
+        Bill.objects
+        .filter(client=client)
+        .with_status()
+        .select_related('client')
+        .prefetch_related('payments')
+    )
 
     context = {
         'client': client,
@@ -185,140 +457,406 @@ def client_bills(request, client_id):
     }
     return render(request, 'sales/client_bills.html', context)
 
+@login_required
 def client_statement(request, client_id):
-    client = get_object_or_404(Client, id=client_id)
+    client = get_object_or_404(Client.objects.for_user(request.user), id=client_id)
+    try:
+        from_date, to_date = statement_dates(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
+
+    statement = cached_statement(client, from_date, to_date)
+
+    context = {
+        'client': client,
+        'statement': statement,
+        'total_billed': statement.total_billed,
+        'total_paid': statement.total_paid,
+        'total_pending': statement.total_pending,
+        'from_date': from_date,
+        'to_date': to_date,
+    }
+
+    return render(request, 'sales/client_statement.html', context)
+
 
-    from_date = request.GET.get('from')
-    to_date = request.GET.get('to')
+def statement_dates(request):
+    # the from and to parameters as dates (None when absent); raises
+    # ValueError with a message for the client when one is not a date
+    dates = []
+    for param in ('from', 'to'):
+        value = request.GET.get(param)
+        try:
+            dates.append(date.fromisoformat(value) if value else None)
+        except ValueError:
+            raise ValueError(f"{param} must be a YYYY-MM-DD date")
+    return dates
+
+
+def statement_pdf_key(client, from_date, to_date):
+    # changes whenever the client's details, bills or payments change
+    parts = [
+        client.id, client.statement_version, from_date or '', to_date or '',
+        client.name, client.phone, client.address,
+    ]
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()
+
+
+def cached_statement(client, from_date, to_date):
+    # keyed on the client's statement_version, which bill and payment writes bump
+    return cached(
+        ['statement', statement_pdf_key(client, from_date, to_date)],
+        lambda: build_statement(client, from_date, to_date),
+    )
 
-    bills = Bill.objects.filter(client=client)
 
-    # ✅ APPLY DATE FILTERS
-    if from_date:
-        bills = bills.filter(bill_date__gte=from_date)
+def statement_pdf_etag(request, client_id):
+    client = Client.objects.for_user(request.user).filter(id=client_id).first()
+    if client is None:
+        return None
+    try:
+        return statement_pdf_key(client, *statement_dates(request))
+    except ValueError:
+        # the view answers with a 400
+        return None
 
-    if to_date:
-        bills = bills.filter(bill_date__lte=to_date)
 
-    bills = bills.prefetch_related('payments').order_by('bill_date')
+@login_required
+@condition(etag_func=statement_pdf_etag)
+def client_statement_pdf(request, client_id):
+    client = get_object_or_404(Client.objects.for_user(request.user), id=client_id)
+    try:
+        from_date, to_date = statement_dates(request)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
 
-    total_billed = bills.aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
+    cache_key = f"statement-pdf:{statement_pdf_key(client, from_date, to_date)}"
+    pdf = cache.get(cache_key)
 
-    total_paid = bills.aggregate(
-        total=Sum('paid_amount')
-    )['total'] or 0
+    if pdf is None:
+        pdf = build_statement_pdf(cached_statement(client, from_date, to_date).pdf_data())
+        cache.set(cache_key, pdf, settings.STATEMENT_PDF_CACHE_SECONDS)
 
+    response = HttpResponse(pdf, content_type='application/pdf')
+    response['Content-Disposition'] = (
+        f'attachment; filename="{client.name}_statement.pdf"'
+    )
+    # browsers must revalidate, which costs a 304 when nothing changed
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@staff_member_required
+def request_performance(request):
+    stats = getattr(RequestMetricsMiddleware, 'stats', None)
     context = {
-        'client': client,
-        'bills': bills,
-        'total_billed': total_billed,
-        'total_paid': total_paid,
-        'total_pending': total_billed - total_paid,
+        **admin.site.each_context(request),
+        'title': "Request performance",
+        'rows': view_percentiles(stats) if stats else [],
+        'config': settings.INSTRUMENTATION,
+    }
+    return render(request, 'sales/performance.html', context)
+
+
+def _collection_trends(request, user):
+    # raises ValueError with a message for the client when a parameter is bad
+    period = request.GET.get('period', 'week')
+    group_by = request.GET.get('group', 'mode')
+    if period not in TREND_PERIODS:
+        raise ValueError(f"period must be one of {', '.join(TREND_PERIODS)}")
+    if group_by not in TREND_GROUPS:
+        raise ValueError(f"group must be one of {', '.join(TREND_GROUPS)}")
+    try:
+        to_date = date.fromisoformat(request.GET['to']) if request.GET.get('to') else timezone.localdate()
+        from_date = (
+            date.fromisoformat(request.GET['from']) if request.GET.get('from')
+            else to_date - timedelta(days=settings.TRENDS_DEFAULT_DAYS)
+        )
+    except ValueError:
+        raise ValueError("from and to must be YYYY-MM-DD dates")
+
+    rollup = DailyCollection.objects.for_user(user).filter(date__gte=from_date, date__lte=to_date)
+    shop_id = request.GET.get('shop')
+    if shop_id:
+        if not shop_id.isdigit():
+            raise ValueError("shop must be a shop id")
+        rollup = rollup.filter(shop_id=shop_id)
+    return {
+        **collection_trends(rollup, period, group_by),
         'from_date': from_date,
         'to_date': to_date,
     }
 
-    return render(request, 'sales/client_statement.html', context)
 
+@login_required
+def collection_trends_page(request):
+    try:
+        trends = _collection_trends(request, request.user)
+    except ValueError as e:
+        return HttpResponseBadRequest(str(e))
 
+    peak = trends['peak'] or 1
+    for row in trends['rows']:
+        row['width'] = round(row['total'] / peak * 100)
+    context = {
+        'trends': trends,
+        'periods': TREND_PERIODS,
+        'groups': TREND_GROUPS,
+        'shops': Shop.objects.for_user(request.user).order_by('id'),
+        'shop_id': request.GET.get('shop', ''),
+    }
+    return render(request, 'sales/collection_trends.html', context)
 
-def client_statement_pdf(request, client_id):
-    client = get_object_or_404(Client, id=client_id)
 
-    from_date = request.GET.get('from')
-    to_date = request.GET.get('to')
+@login_required
+def receivables_aging(request):
+    shops = Shop.objects.for_user(request.user).order_by('id')
+
+    shop_id = request.GET.get('shop')
+    shop = get_object_or_404(shops, id=shop_id) if shop_id else shops.first()
+    if shop is None:
+        raise Http404("No shop to report on")
+
+    context = {
+        'shop': shop,
+        'shops': shops,
+        'report': aging_report(shop),
+    }
+    return render(request, 'sales/aging_report.html', context)
+
+
+@login_required
+def ledger_export(request, file_format):
+    if file_format not in ('csv', 'xlsx'):
+        raise Http404("Unknown export format")
+
+    client_id = request.GET.get('client')
+    shop_id = request.GET.get('shop')
+    user = request.user
+
+    dates = {}
+    for param in ('from', 'to'):
+        value = request.GET.get(param)
+        dates[param] = parse_statement_date(value)
+        if value and dates[param] is None:
+            return HttpResponseBadRequest(f"{param} must be a YYYY-MM-DD date")
+    if not all(value.isdigit() for value in (client_id, shop_id) if value):
+        return HttpResponseBadRequest("client and shop must be ids")
+
+    shops = Shop.objects.for_user(user)
+    client = None
+
+    if client_id:
+        client = get_object_or_404(Client.objects.for_user(user), id=client_id)
+    if shop_id:
+        shops = shops.filter(id=get_object_or_404(shops, id=shop_id).id)
+
+    bills, payments = ledger_querysets(
+        shops=shops,
+        client=client,
+        from_date=dates['from'],
+        to_date=dates['to'],
+    )
+    rows = ledger_rows(bills, payments)
 
-    bills = Bill.objects.filter(client=client)
+    if file_format == 'xlsx':
+        content = iter_xlsx(rows)
+        content_type = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    else:
+        content = iter_csv(rows)
+        content_type = 'text/csv; charset=utf-8'
 
-    if from_date:
-        bills = bills.filter(bill_date__gte=from_date)
+    response = StreamingHttpResponse(streaming_content(content), content_type=content_type)
+    response['Content-Disposition'] = f'attachment; filename="ledger.{file_format}"'
+    return response
 
-    if to_date:
-        bills = bills.filter(bill_date__lte=to_date)
 
-    bills = bills.prefetch_related('payments').order_by('bill_date')
+API_BILL_FIELDS = ('id', 'bill_number', 'client_id', 'client', 'phone', 'due_date', 'total', 'paid', 'pending')
+API_CLIENT_FIELDS = ('client_id', 'client', 'phone', 'open_bills', 'pending')
+API_STATEMENT_FIELDS = ('bill_id', 'bill_number', 'bill_date', 'due_date', 'total', 'paid', 'pending', 'balance', 'payments')
+API_PAYMENT_FIELDS = ('amount', 'payment_mode', 'cheque_number', 'payment_date')
+API_TREND_FIELDS = ('period', 'total', 'count', 'by_series')
+API_CLIENT_SEARCH_FIELDS = ('client_id', 'client', 'phone')
+API_MAX_PAGE_SIZE = 500
 
-    total_billed = bills.aggregate(
-        total=Sum('total_amount')
-    )['total'] or 0
 
-    total_paid = bills.aggregate(
-        total=Sum('paid_amount')
-    )['total'] or 0
+def _shop_versions(request):
+    # one query per request, shared by the ETag and Last-Modified functions
+    if not hasattr(request, '_shop_versions'):
+        request._shop_versions = list(
+            Shop.objects.for_user(request.user)
+            .order_by('id')
+            .values_list('id', 'data_version', 'data_changed_at')
+        )
+    return request._shop_versions
 
-    template = get_template('sales/client_statement_pdf.html')
 
-    html = template.render({
-        'client': client,
-        'bills': bills,
-        'total_billed': total_billed,
-        'total_paid': total_paid,
-        'total_pending': total_billed - total_paid,
-        'from_date': from_date,
-        'to_date': to_date,
-    })
+def shop_data_etag(request, *args, **kwargs):
+    versions = ",".join(f"{shop_id}:{version}" for shop_id, version, _ in _shop_versions(request))
+    # the date is part of it because bills change bucket at midnight
+    parts = [request.path, request.GET.urlencode(), versions, timezone.localdate()]
+    return hashlib.sha256("\x1f".join(map(str, parts)).encode()).hexdigest()
 
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = (
-        f'attachment; filename="{client.name}_statement.pdf"'
+
+def shop_data_last_modified(request, *args, **kwargs):
+    start_of_day = timezone.make_aware(datetime.combine(timezone.localdate(), time.min))
+    changed = [changed_at for _, _, changed_at in _shop_versions(request) if changed_at]
+    return max(changed + [start_of_day])
+
+
+def _api_page_size(request, default):
+    try:
+        return max(1, min(int(request.GET.get('limit', default)), API_MAX_PAGE_SIZE))
+    except ValueError:
+        return default
+
+
+def _api_response(data):
+    response = JsonResponse(data)
+    # clients keep their copy but revalidate, which costs a 304 when nothing changed
+    patch_cache_control(response, private=True, no_cache=True)
+    return response
+
+
+@api_login_required
+@condition(etag_func=shop_data_etag, last_modified_func=shop_data_last_modified)
+def api_open_bills(request):
+    bucket = request.GET.get('bucket', 'overdue')
+    today = timezone.localdate()
+    open_bills = (
+        Bill.objects.for_user(request.user)
+        .filter(is_open=True)
+        .with_status(today)
+        .select_related('client')
+        .only('id', 'bill_number', 'due_date', 'total_amount', 'paid_amount', 'client__name', 'client__phone')
     )
+    buckets = open_bill_buckets(open_bills, today)
+    if bucket not in buckets:
+        return JsonResponse({'error': f"bucket must be one of {', '.join(buckets)}"}, status=400)
+
+    page_size = _api_page_size(request, settings.DASHBOARD_PAGE_SIZES.get(bucket, 50))
+    bills, next_cursor = keyset_page(buckets[bucket], request.GET.get('cursor'), page_size)
+
+    return _api_response({
+        'bucket': bucket,
+        'fields': API_BILL_FIELDS,
+        'results': [
+            [
+                bill.id, bill.bill_number, bill.client_id, bill.client.name, bill.client.phone,
+                bill.due_date, bill.total_amount, bill.paid_amount, bill.pending,
+            ]
+            for bill in bills
+        ],
+        'next_cursor': next_cursor,
+    })
+
+
+@api_login_required
+@condition(etag_func=shop_data_etag, last_modified_func=shop_data_last_modified)
+def api_collection_trends(request):
+    try:
+        trends = _collection_trends(request, request.user)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    return _api_response({
+        'period': trends['period'],
+        'group': trends['group_by'],
+        'from': trends['from_date'],
+        'to': trends['to_date'],
+        'series': trends['series'],
+        'fields': API_TREND_FIELDS,
+        'results': [[row['period'], row['total'], row['count'], row['amounts']] for row in trends['rows']],
+    })
+
+
+@api_login_required
+@condition(etag_func=shop_data_etag, last_modified_func=shop_data_last_modified)
+def api_client_search(request):
+    query = request.GET.get('q', '').strip()
+    if not query:
+        return JsonResponse({'error': 'q is required'}, status=400)
+
+    shop_ids = [shop_id for shop_id, _, _ in _shop_versions(request)]
+    # the first matches the search index yields; ordering by name in the query
+    # would mean reading every match of a short prefix first
+    clients = Client.objects.search(query, shop_ids).values_list('id', 'name', 'phone')
+    return _api_response({
+        'query': query,
+        'fields': API_CLIENT_SEARCH_FIELDS,
+        'results': sorted(clients[:_api_page_size(request, 20)], key=lambda row: (row[1], row[0])),
+    })
 
-    # Create PDF using ReportLab
-    doc = SimpleDocTemplate(response, pagesize=A4, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    story = []
-    styles = getSampleStyleSheet()
-    
-    # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#000000'),
-        spaceAfter=20,
+
+def _decode_summary_cursor(cursor):
+    try:
+        pending, client_id = cursor.rsplit('_', 1)
+        return float(pending), int(client_id)
+    except (AttributeError, ValueError):
+        return None
+
+
+@api_login_required
+@condition(etag_func=shop_data_etag, last_modified_func=shop_data_last_modified)
+def api_client_summary(request):
+    rows = (
+        Bill.objects.for_user(request.user)
+        .filter(is_open=True)
+        .values('client_id', 'client__name', 'client__phone')
+        .annotate(open_bills=Count('id'), pending=Sum(F('total_amount') - F('paid_amount')))
+        .order_by('-pending', 'client_id')
     )
-    story.append(Paragraph(f"Statement for {client.name}", title_style))
-    story.append(Spacer(1, 0.2*inch))
-    
-    # Client Details
-    detail_style = styles['Normal']
-    story.append(Paragraph(f"<b>Client Name:</b> {client.name}", detail_style))
-    story.append(Paragraph(f"<b>Phone:</b> {client.phone}", detail_style))
-    story.append(Paragraph(f"<b>Email:</b> {client.email or 'N/A'}", detail_style))
-    if from_date or to_date:
-        date_range = f"{from_date or 'Start'} to {to_date or 'End'}"
-        story.append(Paragraph(f"<b>Period:</b> {date_range}", detail_style))
-    story.append(Spacer(1, 0.3*inch))
-    
-    # Bills Table
-    table_data = [['Bill No', 'Date', 'Amount', 'Paid', 'Pending']]
-    for bill in bills:
-        table_data.append([
-            str(bill.bill_number),
-            bill.bill_date.strftime('%d-%m-%Y'),
-            f"₹{bill.total_amount:.2f}",
-            f"₹{bill.paid_amount:.2f}",
-            f"₹{bill.pending_amount():.2f}",
-        ])
-    
-    # Add totals row
-    table_data.append(['TOTAL', '', f"₹{total_billed:.2f}", f"₹{total_paid:.2f}", f"₹{total_billed - total_paid:.2f}"])
-    
-    table = Table(table_data, colWidths=[1.2*inch, 1.2*inch, 1.2*inch, 1.2*inch, 1.2*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#4CAF50')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 12),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-        ('BACKGROUND', (0, -1), (-1, -1), colors.HexColor('#E0E0E0')),
-        ('FONTNAME', (0, -1), (-1, -1), 'Helvetica-Bold'),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-    ]))
-    story.append(table)
-    
-    # Build PDF
-    doc.build(story)
-    return response
+    # keyset on (pending desc, client id), applied to the aggregate
+    position = _decode_summary_cursor(request.GET.get('cursor'))
+    if position:
+        pending, client_id = position
+        rows = rows.filter(Q(pending__lt=pending) | Q(pending=pending, client_id__gt=client_id))
+
+    page_size = _api_page_size(request, 100)
+    rows = list(rows.values_list('client_id', 'client__name', 'client__phone', 'open_bills', 'pending')[:page_size + 1])
+    next_cursor = None
+    if len(rows) > page_size:
+        last = rows[page_size - 1]
+        next_cursor = f"{last[4]!r}_{last[0]}"
+
+    return _api_response({
+        'fields': API_CLIENT_FIELDS,
+        'results': rows[:page_size],
+        'next_cursor': next_cursor,
+    })
+
+
+@api_login_required
+@condition(etag_func=statement_pdf_etag)
+def api_client_statement(request, client_id):
+    client = Client.objects.for_user(request.user).filter(id=client_id).first()
+    if client is None:
+        return JsonResponse({'error': 'Client not found'}, status=404)
+
+    try:
+        from_date, to_date = statement_dates(request)
+    except ValueError as e:
+        return JsonResponse({'error': str(e)}, status=400)
+
+    statement = cached_statement(client, from_date, to_date)
+    return _api_response({
+        'client': {'id': client.id, 'name': client.name, 'phone': client.phone, 'address': client.address},
+        'from': statement.from_date,
+        'to': statement.to_date,
+        'total_billed': statement.total_billed,
+        'total_paid': statement.total_paid,
+        'total_pending': statement.total_pending,
+        'fields': API_STATEMENT_FIELDS,
+        'payment_fields': API_PAYMENT_FIELDS,
+        'lines': [
+            [
+                line.bill_id, line.bill_number, line.bill_date, line.due_date, line.total_amount,
+                line.paid_amount, line.pending, line.balance,
+                [
+                    [payment.amount, payment.payment_mode, payment.cheque_number, payment.payment_date]
+                    for payment in line.payments
+                ],
+            ]
+            for line in statement.lines
+        ],
+    })
@@ -0,0 +1,41 @@
+# Gunicorn settings for the `web` process in the Procfile (read automatically
+# from the working directory).
+#
+# Layout: a few processes with a few threads each. Views spend most of their
+# time waiting on the database, so threads keep a worker busy while one
+# request waits; processes give real parallelism for PDF rendering.
+#
+# Each thread keeps its own database connection open for DB_CONN_MAX_AGE
+# seconds, so PostgreSQL sees up to WEB_CONCURRENCY * GUNICORN_THREADS
+# connections per dyno/host. Keep that below max_connections (or put
+# PgBouncer in front and set DB_DISABLE_SERVER_SIDE_CURSORS=1).
+import multiprocessing
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+workers = int(os.environ.get('WEB_CONCURRENCY', min(multiprocessing.cpu_count() * 2 + 1, 5)))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# SERVER_MODE=asgi serves business_manager.asgi on uvicorn workers instead:
+# one event loop per process (`threads` is ignored), so reminders waiting on
+# the WhatsApp gateway and other awaits in the async views hold no thread.
+# The same variable switches the Django settings (see SERVER_MODE there).
+# Compare the two with `manage.py load_test`.
+if os.environ.get('SERVER_MODE') == 'asgi':
+    wsgi_app = 'business_manager.asgi:application'
+    worker_class = 'uvicorn_worker.UvicornWorker'
+else:
+    wsgi_app = 'business_manager.wsgi:application'
+    worker_class = 'gthread'
+
+# statement ZIPs and ledger exports are streamed and can run long
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+graceful_timeout = 30
+keepalive = 5
+
+# recycle workers now and then so memory from large exports is returned
+max_requests = 1000
+max_requests_jitter = 100
+
+accesslog = '-'
@@ -3,7 +3,11 @@ const qrcode = require('qrcode-terminal');
 const express = require('express');
 
 const app = express();
-app.use(express.json());
+app.use(express.json({ limit: '5mb' }));
+
+// Batch sending limits
+const BATCH_CONCURRENCY = parseInt(process.env.BATCH_CONCURRENCY || '5', 10);
+const MAX_BATCH_SIZE = parseInt(process.env.MAX_BATCH_SIZE || '100', 10);
 
 // WhatsApp Client
 const client = new Client({
@@ -34,6 +38,54 @@ app.post('/send-message', async (req, res) => {
     }
 });
 
+async function sendOne(item) {
+    // one bad item gets its own error instead of failing the whole batch
+    if (!item || typeof item !== 'object' || !item.number || !item.message) {
+        return { number: item && item.number, error: 'Each message needs a number and a message' };
+    }
+
+    const { number, message } = item;
+    try {
+        await client.sendMessage(`${number}@c.us`, message);
+        return { number, status: 'Message sent successfully' };
+    } catch (error) {
+        console.error(error);
+        return { number, error: 'Failed to send message' };
+    }
+}
+
+// Run fn over items with at most `limit` calls in flight, keeping result order
+async function mapWithConcurrency(items, limit, fn) {
+    const results = new Array(items.length);
+    let next = 0;
+
+    async function worker() {
+        while (next < items.length) {
+            const index = next++;
+            results[index] = await fn(items[index]);
+        }
+    }
+
+    const workers = Array.from({ length: Math.min(limit, items.length) }, worker);
+    await Promise.all(workers);
+    return results;
+}
+
+// API Endpoint to send many messages in one request
+app.post('/send-messages', async (req, res) => {
+    const { messages } = req.body || {};
+
+    if (!Array.isArray(messages)) {
+        return res.status(400).json({ error: 'messages must be an array' });
+    }
+    if (messages.length > MAX_BATCH_SIZE) {
+        return res.status(413).json({ error: `At most ${MAX_BATCH_SIZE} messages per batch` });
+    }
+
+    const results = await mapWithConcurrency(messages, BATCH_CONCURRENCY, sendOne);
+    res.json({ results });
+});
+
 // Start Server
 app.listen(3000, () => {
     console.log('🚀 WhatsApp Service running on port 3000');